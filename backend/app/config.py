@@ -2,7 +2,8 @@
 Configuration settings for the SIH Solver's Compass API.
 """
 import os
-from typing import List
+from functools import lru_cache
+from typing import Tuple
 from pydantic_settings import BaseSettings
 
 
@@ -13,17 +14,33 @@ class Settings(BaseSettings):
     app_name: str = "SIH Solver's Compass API"
     app_version: str = "1.0.0"
     debug: bool = False
+    # Serve /docs, /redoc and /openapi.json (off by default for deployments)
+    enable_docs: bool = False
     
     # CORS Configuration
-    allowed_origins: List[str] = ["http://localhost:3000", "http://localhost:80", "http://localhost"]
-    allowed_methods: List[str] = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    allowed_headers: List[str] = ["*"]
+    allowed_origins: Tuple[str, ...] = ("http://localhost:3000", "http://localhost:80", "http://localhost")
+    allowed_methods: Tuple[str, ...] = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+    allowed_headers: Tuple[str, ...] = ("*",)
+    
+    # Request Logging
+    # Fraction of requests (0.0-1.0) logged by LoggingMiddleware
+    log_sampling: float = 1.0
     
     # External API Keys
     gemini_api_key: str = ""
     openrouter_api_key: str = ""
     github_token: str = ""
     
+    # Chat Configuration
+    # Stream the fallback models in parallel and keep the first to answer
+    # (costs tokens on every model raced, so off by default)
+    chat_parallel_race: bool = False
+    
+    # Dashboard Configuration
+    # Directory where worker processes share generated dashboard stats
+    # (disabled when empty; each process then keeps its own cache)
+    dashboard_cache_dir: str = ""
+    
     # Database Configuration
     chroma_host: str = "chroma-db"
     chroma_port: int = 8000
@@ -37,5 +54,11 @@ class Settings(BaseSettings):
         extra = 'ignore'
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings once per process; later calls reuse the parsed instance."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
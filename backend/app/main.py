@@ -1,36 +1,82 @@
 """
 FastAPI main application entry point for SIH Solver's Compass API.
 """
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from .config import settings
-from .middleware import ErrorHandlingMiddleware, LoggingMiddleware
-from .models import HealthCheck, ErrorResponse
+from .middleware import (
+    CORSPreflightMiddleware,
+    ErrorHandlingMiddleware,
+    LoggingMiddleware,
+    start_log_listener,
+    stop_log_listener,
+)
+from .models import ErrorResponse, cached_now
 from .routers import search, github, chat, dashboard, docgen
+from .services.chat_service import close_chat_service, get_chat_service
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up queued logging, shared outbound HTTP clients and the chat service for the lifetime of the app."""
+    log_listener = start_log_listener()
+    app.state.http_client = docgen.create_docgen_client()
+    try:
+        app.state.chat_service = get_chat_service()
+    except ValueError as e:
+        # The rest of the API still works without an OpenRouter key
+        logger.warning("Chat service disabled: %s", e)
+        app.state.chat_service = None
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        await close_chat_service()
+        app.state.chat_service = None
+        stop_log_listener(log_listener)
+
 
 # Create FastAPI application instance
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description="AI-powered guidance platform for Smart India Hackathon problem statements",
-    docs_url="/docs",
-    redoc_url="/redoc"
+    docs_url="/docs" if settings.enable_docs else None,
+    redoc_url="/redoc" if settings.enable_docs else None,
+    openapi_url="/openapi.json" if settings.enable_docs else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Add CORS middleware
+# Add CORS middleware (sets give O(1) origin/method checks per request;
+# a bare "*" lets Starlette skip per-header validation)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_origins,
+    allow_origins=frozenset(settings.allowed_origins),
     allow_credentials=True,
-    allow_methods=settings.allowed_methods,
-    allow_headers=settings.allowed_headers,
+    allow_methods=frozenset(settings.allowed_methods),
+    allow_headers=["*"] if "*" in settings.allowed_headers else list(settings.allowed_headers),
 )
 
 # Add custom middleware
 app.add_middleware(ErrorHandlingMiddleware)
 app.add_middleware(LoggingMiddleware)
 
+# Outermost: answer CORS preflights without running the stack above
+app.add_middleware(
+    CORSPreflightMiddleware,
+    allow_origins=settings.allowed_origins,
+    allow_credentials=True,
+    allow_methods=settings.allowed_methods,
+    allow_headers=settings.allowed_headers,
+)
+
 # Include routers
 app.include_router(search.router, prefix="/api")
 app.include_router(github.router, prefix="/api")
@@ -45,30 +91,35 @@ async def root():
     return {
         "message": "SIH Solver's Compass API",
         "version": settings.app_version,
-        "docs": "/docs",
+        "docs": "/docs" if settings.enable_docs else None,
         "health": "/health"
     }
 
 
-@app.get("/health", response_model=HealthCheck)
+# Static health payloads are serialized once at import
+_API_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "api_version": settings.app_version,
+    "services": {
+        "search": "/api/search/health",
+        "github": "/api/github/health",
+        "chat": "/api/chat/health",
+        "dashboard": "/api/dashboard/health"
+    }
+})
+
+
+@app.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring."""
-    return HealthCheck(
-        status="healthy",
-        version=settings.app_version
-    )
+    """Health check endpoint for monitoring (HealthCheck shape, built without validation)."""
+    return ORJSONResponse({
+        "status": "healthy",
+        "timestamp": cached_now(),
+        "version": settings.app_version
+    })
 
 
 @app.get("/api/health")
 async def api_health():
     """API health check endpoint."""
-    return {
-        "status": "healthy",
-        "api_version": settings.app_version,
-        "services": {
-            "search": "/api/search/health",
-            "github": "/api/github/health", 
-            "chat": "/api/chat/health",
-            "dashboard": "/api/dashboard/health"
-        }
-    }
\ No newline at end of file
+    return Response(_API_HEALTH_BODY, media_type="application/json")
\ No newline at end of file
@@ -1,19 +1,164 @@
 """
 Middleware for error handling and request processing.
 """
+import copy
 import logging
-import traceback
+import queue
+import random
+import time
 from datetime import datetime
-from typing import Callable
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Iterable
 from fastapi import Request, Response, HTTPException
-from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import ALL_METHODS, SAFELISTED_HEADERS
+from starlette.requests import ClientDisconnect
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .config import settings
 from .models import ErrorResponse
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Health probes are hit constantly by orchestrators; never log them
+SKIP_PATHS = frozenset({
+    "/health",
+    "/api/health",
+    "/api/chat/health",
+    "/api/search/health",
+    "/api/github/health",
+    "/api/dashboard/health",
+})
+
+
+class DeferredTracebackQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves traceback formatting to the listener thread.
+    
+    The stock prepare() renders exc_info on the calling (event loop) thread
+    before enqueueing; this one only merges the message arguments and keeps
+    exc_info on the record for the listener's formatter.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        return record
+
+
+def start_log_listener() -> QueueListener:
+    """
+    Configure root logging to enqueue records and write them from a background thread.
+    
+    Request handlers only pay for a queue put; traceback formatting and stderr
+    I/O happen off the event loop.
+    """
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(DeferredTracebackQueueHandler(log_queue))
+    
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+
+def stop_log_listener(listener: QueueListener) -> None:
+    """Detach the queue handler installed by start_log_listener and flush pending records."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+            root.removeHandler(handler)
+    listener.stop()
+
+
+class CORSPreflightMiddleware:
+    """
+    Answer valid CORS preflight requests before the rest of the middleware stack.
+    
+    Mirrors CORSMiddleware's acceptance rules with headers built once at startup.
+    Preflights it would reject (unknown origin, method or header) fall through
+    so CORSMiddleware still produces its usual 400 response.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Iterable[str] = (),
+        allow_methods: Iterable[str] = ("GET",),
+        allow_headers: Iterable[str] = (),
+        allow_credentials: bool = False,
+        max_age: int = 600,
+    ) -> None:
+        allow_origins = frozenset(allow_origins)
+        allow_methods = frozenset(allow_methods)
+        allow_headers = frozenset(allow_headers)
+        if "*" in allow_methods:
+            allow_methods = frozenset(ALL_METHODS)
+        
+        self.app = app
+        self.allow_origins = allow_origins
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_methods = allow_methods
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_headers = frozenset(h.lower() for h in SAFELISTED_HEADERS | allow_headers)
+        # Browsers require the origin to be echoed back when credentials are allowed
+        self.echo_origin = not self.allow_all_origins or allow_credentials
+        
+        static_headers = [
+            (b"access-control-allow-methods", ", ".join(sorted(allow_methods)).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+        ]
+        if self.echo_origin:
+            static_headers.append((b"vary", b"Origin"))
+        else:
+            static_headers.append((b"access-control-allow-origin", b"*"))
+        if not self.allow_all_headers:
+            allowed = ", ".join(sorted(SAFELISTED_HEADERS | allow_headers))
+            static_headers.append((b"access-control-allow-headers", allowed.encode("latin-1")))
+        if allow_credentials:
+            static_headers.append((b"access-control-allow-credentials", b"true"))
+        self.static_headers = static_headers
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        origin = headers.get("origin")
+        requested_method = headers.get("access-control-request-method")
+        requested_headers = headers.get("access-control-request-headers")
+        if (
+            origin is None
+            or requested_method is None
+            or not self._is_allowed(origin, requested_method, requested_headers)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        response_headers = list(self.static_headers)
+        if self.echo_origin:
+            response_headers.append((b"access-control-allow-origin", origin.encode("latin-1")))
+        if self.allow_all_headers and requested_headers is not None:
+            response_headers.append((b"access-control-allow-headers", requested_headers.encode("latin-1")))
+        
+        await send({"type": "http.response.start", "status": 204, "headers": response_headers})
+        await send({"type": "http.response.body", "body": b""})
+    
+    def _is_allowed(self, origin: str, method: str, requested_headers: str | None) -> bool:
+        if not self.allow_all_origins and origin not in self.allow_origins:
+            return False
+        if method not in self.allow_methods:
+            return False
+        if requested_headers is None or self.allow_all_headers:
+            return True
+        return all(h.strip().lower() in self.allow_headers for h in requested_headers.split(","))
+
 
 class ErrorHandlingMiddleware(BaseHTTPMiddleware):
     """
@@ -27,63 +172,71 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
         except HTTPException as exc:
             # FastAPI HTTPExceptions are handled by FastAPI itself
             raise exc
+        except ClientDisconnect:
+            # The client went away mid-request; nobody will read a response or
+            # needs a traceback. 499 is the conventional "client closed request".
+            logger.info("Client disconnected: %s", request.url.path)
+            return Response(status_code=499)
         except Exception as exc:
-            # Log the full exception for debugging
-            logger.error(f"Unhandled exception: {str(exc)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            # Log the full exception for debugging; the traceback is formatted
+            # on the log listener thread (see DeferredTracebackQueueHandler)
+            logger.exception("Unhandled exception: %s", exc)
             
             # Return a standardized error response
             error_response = ErrorResponse(
                 error="internal_server_error",
                 message="An unexpected error occurred. Please try again later.",
-                details={"path": str(request.url.path)} if request else None,
+                details={"path": request.url.path} if request else None,
                 timestamp=datetime.now()
             )
             
-            content = error_response.model_dump()
-            # Convert non-serializable fields (e.g., datetime) to string
-            if isinstance(content.get("timestamp"), datetime):
-                content["timestamp"] = content["timestamp"].isoformat()
-
-            return JSONResponse(
+            # Serialize straight to JSON bytes (timestamp included) in pydantic-core
+            return Response(
+                content=error_response.model_dump_json(),
                 status_code=500,
-                content=content
+                media_type="application/json"
             )
 
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     """
     Request/response logging middleware.
+    
+    Health-check paths are never logged, and only a `settings.log_sampling`
+    fraction of the remaining requests are.
     """
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = datetime.now()
+        if request.url.path in SKIP_PATHS:
+            return await call_next(request)
+        if settings.log_sampling < 1.0 and random.random() >= settings.log_sampling:
+            return await call_next(request)
+        
+        start_ns = time.monotonic_ns()
         
         # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
+        logger.info("Request: %s %s", request.method, request.url.path)
         
         try:
             response = await call_next(request)
             
             # Calculate processing time
-            process_time = (datetime.now() - start_time).total_seconds()
+            process_time = (time.monotonic_ns() - start_ns) / 1e9
             
             # Log response
             logger.info(
-                f"Response: {response.status_code} - "
-                f"Time: {process_time:.3f}s - "
-                f"Path: {request.url.path}"
+                "Response: %s - Time: %.3fs - Path: %s",
+                response.status_code, process_time, request.url.path
             )
             
             # Add processing time header
-            response.headers["X-Process-Time"] = str(process_time)
+            response.headers["X-Process-Time"] = f"{process_time:.3f}"
             
             return response
         except Exception as exc:
-            process_time = (datetime.now() - start_time).total_seconds()
+            process_time = (time.monotonic_ns() - start_ns) / 1e9
             logger.error(
-                f"Error: {str(exc)} - "
-                f"Time: {process_time:.3f}s - "
-                f"Path: {request.url.path}"
+                "Error: %s - Time: %.3fs - Path: %s",
+                exc, process_time, request.url.path
             )
             raise exc
\ No newline at end of file
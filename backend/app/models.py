@@ -1,9 +1,31 @@
 """
 Pydantic models for all data structures in the SIH Solver's Compass API.
 """
+import time
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+
+# Second-granularity clock shared by response timestamps
+_now_cache = {"t": 0.0, "v": None}
+
+
+def cached_now() -> datetime:
+    """Return the current local time, refreshed at most once per second."""
+    t = time.monotonic()
+    if _now_cache["v"] is None or t - _now_cache["t"] >= 1.0:
+        _now_cache.update(t=t, v=datetime.now())
+    return _now_cache["v"]
+
+
+# Config for DTOs validated on every request: immutable, unknown fields ignored
+HOT_DTO_CONFIG = ConfigDict(
+    extra="ignore",
+    frozen=True,
+    populate_by_name=True,
+    validate_assignment=False,
+)
 
 
 class ProblemStatement(BaseModel):
@@ -20,6 +42,8 @@ class ProblemStatement(BaseModel):
 
 class SearchQuery(BaseModel):
     """Search request model."""
+    model_config = HOT_DTO_CONFIG
+    
     query: str = Field(..., description="Natural language search query")
     limit: int = Field(default=20, ge=1, le=100, description="Maximum number of results")
 
@@ -30,8 +54,15 @@ class SearchResult(BaseModel):
     similarity_score: float = Field(..., ge=0.0, le=1.0, description="Cosine similarity score")
 
 
+# Serializes result lists straight to JSON bytes in pydantic-core
+SEARCH_RESULTS_ADAPTER = TypeAdapter(List[SearchResult])
+SEARCH_RESULT_BATCHES_ADAPTER = TypeAdapter(List[List[SearchResult]])
+
+
 class ChatRequest(BaseModel):
     """Chat request model."""
+    model_config = HOT_DTO_CONFIG
+    
     problem_id: str = Field(..., description="Problem statement ID for context")
     problem_context: str = Field(..., description="Full problem statement context")
     # user_question must be non-empty to satisfy validation expectations (empty -> 422)
@@ -42,7 +73,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     """Chat response model."""
     response: str = Field(..., description="AI assistant response")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Response timestamp")
+    timestamp: datetime = Field(default_factory=cached_now, description="Response timestamp")
 
 
 class ChatModel(BaseModel):
@@ -90,14 +121,18 @@ class DashboardStats(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Standard error response model."""
+    model_config = HOT_DTO_CONFIG
+    
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Human-readable error message")
     details: Optional[Dict] = Field(default=None, description="Additional error details")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Error timestamp")
+    timestamp: datetime = Field(default_factory=cached_now, description="Error timestamp")
 
 
 class HealthCheck(BaseModel):
     """Health check response model."""
+    model_config = HOT_DTO_CONFIG
+    
     status: str = Field(..., description="Service status")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Check timestamp")
+    timestamp: datetime = Field(default_factory=cached_now, description="Check timestamp")
     version: str = Field(..., description="API version")
\ No newline at end of file
@@ -3,17 +3,56 @@ Chat service router for interactive problem statement exploration.
 """
 import json
 import logging
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
 from ..models import ChatRequest, ChatResponse, ChatModelsResponse
-from ..services.chat_service import get_chat_service
+from ..services.chat_service import ChatService, get_chat_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "chat"})
+
+# Suggested questions and the model catalog are static, so their response
+# bodies are serialized once on first use
+_suggestions_body: bytes | None = None
+_models_body: bytes | None = None
+
+
+def chat_service_dep(request: Request) -> Optional[ChatService]:
+    """
+    Return the app-wide chat service, creating it if lifespan did not.
+    
+    Resolves to None when the service cannot be configured; endpoints turn
+    that into a 503 via require_chat_service once the request body has been
+    validated (an HTTPException raised here would preempt the 422).
+    """
+    chat_service = getattr(request.app.state, "chat_service", None)
+    if chat_service is None:
+        try:
+            chat_service = get_chat_service()
+        except ValueError as e:
+            logger.error(f"Chat service unavailable: {str(e)}")
+    return chat_service
+
+
+def require_chat_service(chat_service: Optional[ChatService]) -> ChatService:
+    """Raise a 503 if the chat service is not configured."""
+    if chat_service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Chat service is not configured"
+        )
+    return chat_service
+
 
 @router.post("/", response_model=ChatResponse)
-async def chat_with_problem(chat_request: ChatRequest) -> ChatResponse:
+async def chat_with_problem(
+    chat_request: ChatRequest,
+    chat_service: Optional[ChatService] = Depends(chat_service_dep)
+) -> ChatResponse:
     """
     Interactive chat about a specific problem statement using Gemini API.
     
@@ -26,9 +65,9 @@ async def chat_with_problem(chat_request: ChatRequest) -> ChatResponse:
     Raises:
         HTTPException: If chat generation fails or context is invalid
     """
+    chat_service = require_chat_service(chat_service)
     try:
         # Generate response using the chat service
-        chat_service = get_chat_service()
         response_text = await chat_service.generate_response(
             problem_context=chat_request.problem_context,
             user_question=chat_request.user_question,
@@ -52,7 +91,11 @@ async def chat_with_problem(chat_request: ChatRequest) -> ChatResponse:
 
 
 @router.post("/stream")
-async def chat_stream(chat_request: ChatRequest) -> StreamingResponse:
+async def chat_stream(
+    chat_request: ChatRequest,
+    request: Request,
+    chat_service: Optional[ChatService] = Depends(chat_service_dep)
+) -> StreamingResponse:
     """
     Streaming chat response for real-time interaction.
     
@@ -66,8 +109,8 @@ async def chat_stream(chat_request: ChatRequest) -> StreamingResponse:
         HTTPException: If streaming fails or context is invalid
     """
     try:
-        # Get chat service and validate the request first
-        chat_service = get_chat_service()
+        # Validate the request first
+        chat_service = require_chat_service(chat_service)
         if not chat_service._validate_context(chat_request.problem_context):
             raise HTTPException(
                 status_code=400,
@@ -76,18 +119,27 @@ async def chat_stream(chat_request: ChatRequest) -> StreamingResponse:
         
         async def generate_stream():
             """Generator function for streaming response (plain text chunks)."""
+            stream = chat_service.generate_streaming_response(
+                problem_context=chat_request.problem_context,
+                user_question=chat_request.user_question,
+                model=chat_request.model
+            )
             try:
-                async for chunk in chat_service.generate_streaming_response(
-                    problem_context=chat_request.problem_context,
-                    user_question=chat_request.user_question,
-                    model=chat_request.model
-                ):
+                async for chunk in stream:
+                    # Stop pulling from OpenRouter as soon as the client is gone
+                    if await request.is_disconnected():
+                        logger.info("Client disconnected; aborting chat stream")
+                        break
                     # Yield raw text chunks (no SSE framing) to match test expectations
                     yield chunk
             except Exception as e:
                 logger.error(f"Streaming error: {str(e)}")
                 # Propagate as plain text error message
                 yield f"Error: {str(e)}"
+            finally:
+                # Close the upstream stream now rather than whenever the
+                # abandoned generator is garbage collected
+                await stream.aclose()
 
         return StreamingResponse(
             generate_stream(),
@@ -105,30 +157,35 @@ async def chat_stream(chat_request: ChatRequest) -> StreamingResponse:
 
 
 @router.get("/suggestions")
-async def get_suggested_questions():
+async def get_suggested_questions(chat_service: Optional[ChatService] = Depends(chat_service_dep)):
     """
     Get suggested questions for users to ask about problem statements.
     
     Returns:
         dict: List of suggested questions
     """
-    chat_service = get_chat_service()
-    return {
-        "suggestions": chat_service.get_suggested_questions()
-    }
+    global _suggestions_body
+    if _suggestions_body is None:
+        _suggestions_body = orjson.dumps({
+            "suggestions": require_chat_service(chat_service).get_suggested_questions()
+        })
+    return Response(_suggestions_body, media_type="application/json")
 
 
 @router.get("/models", response_model=ChatModelsResponse)
-async def get_available_models():
+async def get_available_models(chat_service: Optional[ChatService] = Depends(chat_service_dep)):
     """
     Get available chat models for user selection.
     
     Returns:
         ChatModelsResponse: List of available models with metadata
     """
+    global _models_body
+    chat_service = require_chat_service(chat_service)
     try:
-        chat_service = get_chat_service()
-        return chat_service.get_available_models()
+        if _models_body is None:
+            _models_body = orjson.dumps(chat_service.get_available_models().model_dump())
+        return Response(_models_body, media_type="application/json")
     except Exception as e:
         logger.error(f"Failed to get available models: {str(e)}")
         raise HTTPException(
@@ -140,4 +197,4 @@ async def get_available_models():
 @router.get("/health")
 async def chat_health():
     """Health check endpoint for chat service."""
-    return {"status": "healthy", "service": "chat"}
\ No newline at end of file
+    return Response(_HEALTH_BODY, media_type="application/json")
\ No newline at end of file
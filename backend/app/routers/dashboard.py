@@ -1,17 +1,73 @@
 """
 Dashboard service router for analytics and statistics.
 """
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from ..models import DashboardStats
-from ..services.dashboard_service import dashboard_service, DashboardServiceError
+from ..services.dashboard_service import DashboardService, DashboardServiceError, get_dashboard_service
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# Router-level cache for /stats: entries are fresh for STATS_TTL_SECONDS, after
+# which the stale value keeps being served while one background task refreshes it.
+# "generation" is bumped on every clear, so loads started before it are discarded.
+STATS_TTL_SECONDS = 60.0
+_stats_cache: Dict[str, Any] = {"value": None, "expires": 0.0, "refresh": None, "generation": 0}
+_stats_lock = asyncio.Lock()
+
+
+def clear_stats_cache() -> None:
+    """Drop the router-level stats cache and cancel any refresh in flight."""
+    refresh: Optional[asyncio.Task] = _stats_cache["refresh"]
+    if refresh is not None and not refresh.done():
+        refresh.cancel()
+    _stats_cache.update(value=None, expires=0.0, refresh=None, generation=_stats_cache["generation"] + 1)
+
+
+async def _load_stats(dashboard_service: DashboardService, force_refresh: bool = False) -> DashboardStats:
+    """Fetch stats from the service and store them in the router cache unless it was cleared meanwhile."""
+    generation = _stats_cache["generation"]
+    stats = await dashboard_service.get_dashboard_stats(force_refresh=force_refresh)
+    if _stats_cache["generation"] == generation:
+        _stats_cache.update(value=stats, expires=time.monotonic() + STATS_TTL_SECONDS)
+    return stats
+
+
+async def _revalidate_stats(dashboard_service: DashboardService) -> None:
+    """Background refresh of a stale cache entry; failures keep the stale value."""
+    try:
+        await _load_stats(dashboard_service)
+    except Exception as e:
+        logger.warning("Background dashboard stats refresh failed: %s", e)
+    finally:
+        # A clear may already have replaced this task
+        if _stats_cache["refresh"] is asyncio.current_task():
+            _stats_cache["refresh"] = None
+
+
+async def _get_cached_stats(dashboard_service: DashboardService) -> DashboardStats:
+    """Return cached stats, loading them on first use and revalidating when stale."""
+    stats: Optional[DashboardStats] = _stats_cache["value"]
+    if stats is not None:
+        if time.monotonic() >= _stats_cache["expires"] and _stats_cache["refresh"] is None:
+            _stats_cache["refresh"] = asyncio.create_task(_revalidate_stats(dashboard_service))
+        return stats
+    
+    async with _stats_lock:
+        if _stats_cache["value"] is None:
+            return await _load_stats(dashboard_service)
+        return _stats_cache["value"]
+
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    force_refresh: bool = Query(False, description="Force refresh of cached data")
+    force_refresh: bool = Query(False, description="Force refresh of cached data"),
+    dashboard_service: DashboardService = Depends(get_dashboard_service)
 ) -> DashboardStats:
     """
     Provides aggregated statistics for the dashboard visualization.
@@ -26,8 +82,9 @@ async def get_dashboard_stats(
         HTTPException: If statistics generation fails
     """
     try:
-        stats = await dashboard_service.get_dashboard_stats(force_refresh=force_refresh)
-        return stats
+        if force_refresh:
+            return await _load_stats(dashboard_service, force_refresh=True)
+        return await _get_cached_stats(dashboard_service)
     except DashboardServiceError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
@@ -35,7 +92,9 @@ async def get_dashboard_stats(
 
 
 @router.get("/categories", response_model=Dict[str, Any])
-async def get_category_breakdown() -> Dict[str, Any]:
+async def get_category_breakdown(
+    dashboard_service: DashboardService = Depends(get_dashboard_service)
+) -> Dict[str, Any]:
     """
     Get detailed category breakdown with percentages.
     
@@ -52,7 +111,9 @@ async def get_category_breakdown() -> Dict[str, Any]:
 
 
 @router.get("/technology-trends", response_model=Dict[str, Any])
-async def get_technology_trends() -> Dict[str, Any]:
+async def get_technology_trends(
+    dashboard_service: DashboardService = Depends(get_dashboard_service)
+) -> Dict[str, Any]:
     """
     Get technology trends from keyword analysis.
     
@@ -69,7 +130,9 @@ async def get_technology_trends() -> Dict[str, Any]:
 
 
 @router.post("/clear-cache")
-async def clear_dashboard_cache() -> Dict[str, str]:
+async def clear_dashboard_cache(
+    dashboard_service: DashboardService = Depends(get_dashboard_service)
+) -> Dict[str, str]:
     """
     Clear the dashboard cache to force fresh data on next request.
     
@@ -77,6 +140,7 @@ async def clear_dashboard_cache() -> Dict[str, str]:
         Success message
     """
     try:
+        clear_stats_cache()
         await dashboard_service.clear_cache()
         return {"message": "Dashboard cache cleared successfully"}
     except Exception as e:
@@ -84,14 +148,16 @@ async def clear_dashboard_cache() -> Dict[str, str]:
 
 
 @router.get("/health")
-async def dashboard_health() -> Dict[str, Any]:
+async def dashboard_health(
+    dashboard_service: DashboardService = Depends(get_dashboard_service)
+) -> ORJSONResponse:
     """Health check endpoint for dashboard service."""
     try:
         health_status = await dashboard_service.health_check()
-        return health_status
+        return ORJSONResponse(health_status)
     except Exception as e:
-        return {
+        return ORJSONResponse({
             "status": "unhealthy",
             "error": str(e),
             "service": "dashboard"
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -1,17 +1,32 @@
 import httpx
 import asyncio
-from fastapi import APIRouter, HTTPException, Request
+import hashlib
+import logging
+import random
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
 
+from ..models import HOT_DTO_CONFIG
+
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/docgen", tags=["docgen"])
 
 DOCGEN_SERVICE_URL = "http://docgen-go:8080/v1/docgen"
+JSON_HEADERS = {"content-type": "application/json"}
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Total time budget for one proxied call, retries included
+PROXY_DEADLINE_SECONDS = 45.0
+FORWARDED_DOWNLOAD_HEADERS = ("content-type", "content-length", "content-disposition", "content-encoding")
 
 # --- Pydantic Models ---
 
 class DocGenRequest(BaseModel):
+    model_config = HOT_DTO_CONFIG
+
     title: str
     description: str
     constraints: List[str] = []
@@ -62,22 +77,70 @@ class ExportResponse(BaseModel):
     filenames: List[str]
 
 
-# --- Helper Function for Proxying ---
+# --- Shared HTTP Client ---
+
+def create_docgen_client() -> httpx.AsyncClient:
+    """Create the pooled client used for all calls to the docgen service."""
+    return httpx.AsyncClient(
+        base_url=DOCGEN_SERVICE_URL,
+        timeout=45.0,
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+    )
+
+
+def get_docgen_client(request: Request) -> httpx.AsyncClient:
+    """Return the app-wide docgen client, creating it if lifespan did not run."""
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
+        client = request.app.state.http_client = create_docgen_client()
+    return client
+
 
-async def _proxy_request(client: httpx.AsyncClient, method: str, url: str, json: dict = None):
-    # Simple retry with backoff for transient errors
+# --- Helper Functions for Proxying ---
+
+async def _backoff(attempt: int, deadline: float) -> bool:
+    """Sleep with full-jitter exponential backoff; False if the deadline leaves no room to retry."""
+    delay = random.uniform(0, min(2.0, 0.25 * 2 ** attempt))
+    if time.monotonic() + delay >= deadline:
+        return False
+    await asyncio.sleep(delay)
+    return True
+
+
+async def _send_with_retry(
+    client: httpx.AsyncClient, method: str, url: str, body: bytes | None = None, read: bool = False
+) -> httpx.Response:
+    """
+    Send a request to the docgen service. With ``read`` the body is read (and
+    the response closed) inside the retry loop; otherwise the open, unread
+    response is returned for streaming.
+    """
+    # Retry transient errors with jittered backoff, within one overall deadline
     retries = 2
-    last_exc: Exception | None = None
+    deadline = time.monotonic() + PROXY_DEADLINE_SECONDS
     for attempt in range(retries + 1):
+        resp: httpx.Response | None = None
         try:
-            resp = await client.request(method, url, json=json, timeout=45.0)
+            request = client.build_request(
+                method, url, content=body, headers=JSON_HEADERS,
+                timeout=max(0.1, deadline - time.monotonic()),
+            )
+            resp = await client.send(request, stream=True)
+            if resp.is_error:
+                # Read the error body here, so a failed read takes the
+                # retry/503 path below instead of escaping the handlers
+                await resp.aread()
+                await resp.aclose()
             resp.raise_for_status()
-            return resp.json()
+            if read:
+                # Read failures are retried like connect failures
+                await resp.aread()
+                await resp.aclose()
+            return resp
         except httpx.HTTPStatusError as e:
             # Do not retry on 4xx except 429
             status = e.response.status_code
-            if status in (502, 503, 504, 429) and attempt < retries:
-                await asyncio.sleep(0.5 * (attempt + 1))
+            if status in (502, 503, 504, 429) and attempt < retries and await _backoff(attempt, deadline):
                 continue
             detail = e.response.text
             try:
@@ -86,54 +149,112 @@ async def _proxy_request(client: httpx.AsyncClient, method: str, url: str, json:
                 pass
             raise HTTPException(status_code=status, detail=detail)
         except httpx.RequestError as e:
-            last_exc = e
-            if attempt < retries:
-                await asyncio.sleep(0.5 * (attempt + 1))
+            if resp is not None:
+                await resp.aclose()
+            if attempt < retries and await _backoff(attempt, deadline):
                 continue
             raise HTTPException(status_code=503, detail=f"Docgen service unavailable: {e}")
 
 
+async def _proxy_request(client: httpx.AsyncClient, method: str, url: str, body: bytes | None = None):
+    resp = await _send_with_retry(client, method, url, body, read=True)
+    return resp.json()
+
+
+# Upstream calls currently in flight, keyed by a hash of method, path and body
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+async def _coalesced_proxy_request(client: httpx.AsyncClient, method: str, url: str, body: bytes | None = None):
+    """
+    Proxy an idempotent request, sharing one upstream call between identical
+    concurrent callers.
+    """
+    key = hashlib.blake2b(f"{method} {url}\n".encode() + (body or b""), digest_size=16).hexdigest()
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_proxy_request(client, method, url, body))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller disconnecting does not cancel the call for the others
+    return await asyncio.shield(task)
+
+
+async def _proxy_stream_json(client: httpx.AsyncClient, method: str, url: str, body: bytes | None = None) -> StreamingResponse:
+    """Forward the docgen JSON body to the caller as it arrives, without parsing it."""
+    resp = await _send_with_retry(client, method, url, body)
+
+    async def stream_body():
+        try:
+            async for chunk in resp.aiter_bytes():
+                yield chunk
+        except httpx.HTTPError as e:
+            # Headers are already sent, so the client just sees a truncated body
+            logger.error("Error streaming full document from docgen service: %s", e)
+
+    return StreamingResponse(
+        stream_body(),
+        status_code=resp.status_code,
+        media_type="application/json",
+        background=BackgroundTask(resp.aclose),
+    )
+
+
 # --- API Endpoints ---
 
 @router.post("/summary", response_model=SummaryResponse)
-async def generate_summary(request: DocGenRequest):
-    async with httpx.AsyncClient() as client:
-        return await _proxy_request(client, "POST", f"{DOCGEN_SERVICE_URL}/summary", json=request.dict())
+async def generate_summary(request: DocGenRequest, client: httpx.AsyncClient = Depends(get_docgen_client)):
+    return await _coalesced_proxy_request(client, "POST", "/summary", body=request.model_dump_json().encode())
 
 @router.post("/plan", response_model=PlanResponse)
-async def generate_plan(request: DocGenRequest):
-    async with httpx.AsyncClient() as client:
-        return await _proxy_request(client, "POST", f"{DOCGEN_SERVICE_URL}/plan", json=request.dict())
+async def generate_plan(request: DocGenRequest, client: httpx.AsyncClient = Depends(get_docgen_client)):
+    return await _coalesced_proxy_request(client, "POST", "/plan", body=request.model_dump_json().encode())
 
 @router.post("/design", response_model=DesignResponse)
-async def generate_design(request: DocGenRequest):
-    async with httpx.AsyncClient() as client:
-        return await _proxy_request(client, "POST", f"{DOCGEN_SERVICE_URL}/design", json=request.dict())
+async def generate_design(request: DocGenRequest, client: httpx.AsyncClient = Depends(get_docgen_client)):
+    return await _coalesced_proxy_request(client, "POST", "/design", body=request.model_dump_json().encode())
 
-@router.post("/full", response_model=FullResponse)
-async def generate_full(request: FullDocGenRequest):
-    async with httpx.AsyncClient() as client:
-        return await _proxy_request(client, "POST", f"{DOCGEN_SERVICE_URL}/full", json=request.dict())
+# The full bundle can be large, so it is streamed through as-is rather than
+# parsed and re-validated against FullResponse.
+@router.post("/full")
+async def generate_full(request: FullDocGenRequest, client: httpx.AsyncClient = Depends(get_docgen_client)):
+    return await _proxy_stream_json(client, "POST", "/full", body=request.model_dump_json().encode())
 
 @router.post("/export", response_model=ExportResponse)
-async def export_document(request: ExportRequest):
-    async with httpx.AsyncClient() as client:
-        return await _proxy_request(client, "POST", f"{DOCGEN_SERVICE_URL}/export", json=request.dict())
+async def export_document(request: ExportRequest, client: httpx.AsyncClient = Depends(get_docgen_client)):
+    return await _proxy_request(client, "POST", "/export", body=request.model_dump_json().encode())
 
 @router.get("/download/{artifact_id}/{filename}")
-async def download_artifact(artifact_id: str, filename: str):
-    url = f"{DOCGEN_SERVICE_URL}/files/{artifact_id}/{filename}"
+async def download_artifact(
+    artifact_id: str,
+    filename: str,
+    client: httpx.AsyncClient = Depends(get_docgen_client),
+):
+    url = f"/files/{artifact_id}/{filename}"
+
+    # Open the upstream response first so its status and headers can be forwarded
+    try:
+        response = await client.send(client.build_request("GET", url, timeout=30.0), stream=True)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"Docgen service unavailable: {e}")
+    if response.is_error:
+        await response.aclose()
+        raise HTTPException(status_code=response.status_code, detail="Artifact not available")
 
     async def stream_generator():
         try:
-            async with httpx.AsyncClient() as client:
-                async with client.stream("GET", url, timeout=30.0) as response:
-                    response.raise_for_status()
-                    async for chunk in response.aiter_bytes():
-                        yield chunk
+            async for chunk in response.aiter_raw(DOWNLOAD_CHUNK_SIZE):
+                yield chunk
         except httpx.HTTPError as e:
-            # This part is tricky because we can't raise HTTPException after starting the stream.
-            # The client will see a broken connection. Logging is important here.
-            print(f"Error streaming artifact from docgen service: {e}")
+            # Headers are already sent at this point, so the client just sees a
+            # truncated body. Logging is important here.
+            logger.error("Error streaming artifact from docgen service: %s", e)
 
-    return StreamingResponse(stream_generator())
+    # Raw (still encoded) bytes are forwarded, so Content-Encoding must go with them
+    headers = {k: response.headers[k] for k in FORWARDED_DOWNLOAD_HEADERS if k in response.headers}
+    return StreamingResponse(
+        stream_generator(),
+        status_code=response.status_code,
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
@@ -2,12 +2,15 @@
 GitHub service router for personalized recommendations.
 """
 from typing import List
-from fastapi import APIRouter, HTTPException
-from ..models import GitHubRecommendationRequest, SearchResult, GitHubProfile
+import orjson
+from fastapi import APIRouter, HTTPException, Response
+from ..models import SEARCH_RESULTS_ADAPTER, GitHubRecommendationRequest, SearchResult, GitHubProfile
 from ..services.github_service import github_service
 
 router = APIRouter(prefix="/github", tags=["github"])
 
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "github"})
+
 
 @router.post("/recommend", response_model=List[SearchResult])
 async def github_recommendations(request: GitHubRecommendationRequest) -> List[SearchResult]:
@@ -25,7 +28,7 @@ async def github_recommendations(request: GitHubRecommendationRequest) -> List[S
     """
     try:
         results = await github_service.get_recommendations(request.username)
-        return results
+        return Response(SEARCH_RESULTS_ADAPTER.dump_json(results), media_type="application/json")
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -52,7 +55,7 @@ async def get_github_profile(username: str) -> GitHubProfile:
     """
     try:
         profile = await github_service.get_github_profile(username)
-        return profile
+        return Response(profile.model_dump_json(), media_type="application/json")
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -66,4 +69,4 @@ async def get_github_profile(username: str) -> GitHubProfile:
 @router.get("/health")
 async def github_health():
     """Health check endpoint for GitHub service."""
-    return {"status": "healthy", "service": "github"}
\ No newline at end of file
+    return Response(_HEALTH_BODY, media_type="application/json")
\ No newline at end of file
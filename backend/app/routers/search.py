@@ -2,12 +2,32 @@
 Search service router for semantic search functionality.
 """
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
-from ..models import SearchQuery, SearchResult, ProblemStatement
+from fastapi import APIRouter, HTTPException, Query, Response
+from ..models import (
+    SEARCH_RESULT_BATCHES_ADAPTER,
+    SEARCH_RESULTS_ADAPTER,
+    SearchQuery,
+    SearchResult,
+    ProblemStatement,
+)
+from ..services.cache import TTLCache
 from ..services.search_service import search_service, SearchServiceError
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+# Serialized result bodies for recent (normalized query, limit) pairs, so
+# repeated searches skip the embedding and the ChromaDB round trip
+SEARCH_CACHE_TTL_SECONDS = 60.0
+_search_cache = TTLCache(ttl_seconds=SEARCH_CACHE_TTL_SECONDS, maxsize=1024)
+
+# Upper bound on queries accepted by /search/batch
+MAX_BATCH_QUERIES = 32
+
+
+def clear_search_cache() -> None:
+    """Drop all cached search result bodies."""
+    _search_cache.clear()
+
 
 @router.post("/", response_model=List[SearchResult])
 @router.post("", response_model=List[SearchResult])  # accept missing trailing slash too
@@ -26,19 +46,22 @@ async def semantic_search(query: SearchQuery) -> List[SearchResult]:
     """
     try:
         # Validate query
-        if not query.query.strip():
+        text = query.query.strip()
+        if not text:
             raise HTTPException(
                 status_code=400,
                 detail="Search query cannot be empty"
             )
         
-        # Perform semantic search
-        results = await search_service.search(
-            query=query.query.strip(),
-            limit=query.limit
-        )
+        async def run_search() -> bytes:
+            results = await search_service.search(query=text, limit=query.limit)
+            # Results are already validated models; dump them in one pass instead
+            # of FastAPI re-validating and jsonable_encoder walking every field
+            return SEARCH_RESULTS_ADAPTER.dump_json(results)
         
-        return results
+        # The embedding model is uncased, so case-only variants share an entry
+        body = await _search_cache.get_or_load((text.lower(), query.limit), run_search)
+        return Response(body, media_type="application/json")
         
     except SearchServiceError as e:
         raise HTTPException(
@@ -55,6 +78,51 @@ async def semantic_search(query: SearchQuery) -> List[SearchResult]:
         )
 
 
+@router.post("/batch", response_model=List[List[SearchResult]])
+async def batch_semantic_search(queries: List[SearchQuery]) -> List[List[SearchResult]]:
+    """
+    Performs semantic search for several queries in one request.
+    
+    Args:
+        queries: SearchQuery objects, each with its own limit
+        
+    Returns:
+        One list of SearchResult objects per query, in request order
+        
+    Raises:
+        HTTPException: If the batch is empty, too large, holds an empty query,
+            or search fails
+    """
+    try:
+        if not queries or len(queries) > MAX_BATCH_QUERIES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch must contain between 1 and {MAX_BATCH_QUERIES} queries"
+            )
+        texts = [q.query.strip() for q in queries]
+        if not all(texts):
+            raise HTTPException(
+                status_code=400,
+                detail="Search query cannot be empty"
+            )
+        
+        results = await search_service.search_many(texts, [q.limit for q in queries])
+        return Response(SEARCH_RESULT_BATCHES_ADAPTER.dump_json(results), media_type="application/json")
+        
+    except SearchServiceError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Search service error: {str(e)}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected error during search: {str(e)}"
+        )
+
+
 @router.get("/problem/{problem_id}", response_model=ProblemStatement)
 async def get_problem_by_id(problem_id: str) -> ProblemStatement:
     """
@@ -78,7 +146,7 @@ async def get_problem_by_id(problem_id: str) -> ProblemStatement:
                 detail=f"Problem statement not found: {problem_id}"
             )
         
-        return problem
+        return Response(problem.model_dump_json(), media_type="application/json")
         
     except SearchServiceError as e:
         raise HTTPException(
@@ -0,0 +1,107 @@
+"""
+Semantic response cache for chat completions.
+
+Answers are keyed by (problem context, model) and matched on the cosine
+similarity of the question embedding, so paraphrases of a question that was
+already answered for the same problem skip the LLM round trip.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from loguru import logger
+
+# Cosine distance under which two questions are treated as the same question
+MAX_DISTANCE = 0.1
+
+# Answers kept per (problem, model); the oldest is dropped past this
+MAX_ENTRIES_PER_KEY = 32
+
+
+class SemanticChatCache:
+    """In-process LRU of chat answers, matched by question embedding."""
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl_seconds: float = 3600.0,
+        max_distance: float = MAX_DISTANCE,
+        max_entries_per_key: int = MAX_ENTRIES_PER_KEY,
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.max_entries_per_key = max_entries_per_key
+        # (context digest, model) -> [(normalized embedding, response, expires at)]
+        self._entries: "OrderedDict[Tuple[bytes, str], List[Tuple[np.ndarray, str, float]]]" = OrderedDict()
+
+    @staticmethod
+    def _key(problem_context: str, model: str) -> Tuple[bytes, str]:
+        digest = hashlib.blake2b(problem_context.encode(), digest_size=16).digest()
+        return digest, model
+
+    @staticmethod
+    def embed(question: str) -> Optional[np.ndarray]:
+        """
+        Embed a question with the search service's sentence-transformers model.
+
+        Returns None when the model has not been loaded yet; the cache never
+        loads it itself, as that would cost far more than it saves.
+        """
+        from .search_service import search_service
+
+        model = search_service.sentence_model
+        if model is None:
+            return None
+        try:
+            vec = np.asarray(model.encode([question])[0], dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Failed to embed chat question for caching: {str(e)}")
+            return None
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def lookup(self, embedding: Optional[np.ndarray], problem_context: str, model: str) -> Optional[str]:
+        """Return the cached answer closest to ``embedding`` if within range."""
+        if embedding is None:
+            return None
+        key = self._key(problem_context, model)
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+
+        now = time.monotonic()
+        entries[:] = [entry for entry in entries if entry[2] > now]
+        if not entries:
+            del self._entries[key]
+            return None
+
+        best_distance, best_response = min(
+            (1.0 - float(np.dot(vec, embedding)), response) for vec, response, _ in entries
+        )
+        if best_distance > self.max_distance:
+            return None
+        self._entries.move_to_end(key)
+        return best_response
+
+    def store(self, embedding: Optional[np.ndarray], problem_context: str, model: str, response: str) -> None:
+        """Remember ``response`` as the answer to the embedded question."""
+        if embedding is None or not response:
+            return
+        key = self._key(problem_context, model)
+        now = time.monotonic()
+        entries = self._entries.setdefault(key, [])
+        entries[:] = [entry for entry in entries if entry[2] > now]
+        entries.append((embedding, response, now + self.ttl_seconds))
+        # Entries are appended in order, so the oldest are at the front
+        del entries[:-self.max_entries_per_key]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        self._entries.clear()
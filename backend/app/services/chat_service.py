@@ -2,82 +2,147 @@
 Chat service for interactive problem statement exploration using OpenRouter.
 """
 import os
+import asyncio
+import hashlib
 import httpx
-import json
-from typing import AsyncGenerator, List, Dict
+import orjson
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncGenerator, List, Dict, Optional
 
 from loguru import logger
 from app.config import settings
 from app.models import ChatRequest, ChatResponse, ProblemStatement, ChatModel, ChatModelsResponse
+from app.services.chat_cache import SemanticChatCache
+
+# Size of the pieces a cached answer is replayed in on the streaming path
+CACHED_CHUNK_SIZE = 256
+# Number of formatted system prompts kept per service instance
+SYSTEM_PROMPT_CACHE_SIZE = 256
+
+SYSTEM_PROMPT_TEMPLATE = """You are an AI assistant helping engineering students understand Smart India Hackathon problem statements. 
+
+IMPORTANT CONSTRAINTS:
+- You can ONLY answer questions about the specific problem statement provided in the context
+- If information is not available in the problem context, explicitly state \"This information is not available in the problem statement\"
+- Do not make assumptions or provide information not present in the context
+- Keep responses focused, practical, and helpful for students evaluating this problem
+- Suggest possible approaches, tech stacks, or considerations based only on what's described in the problem
+
+PROBLEM CONTEXT:
+{problem_context}
+
+Please answer the following question about this specific problem statement:"""
+# Constant halves around the context, joined directly instead of re-parsing
+# the template with str.format on every new problem
+SYSTEM_PROMPT_PREFIX, SYSTEM_PROMPT_SUFFIX = SYSTEM_PROMPT_TEMPLATE.split("{problem_context}")
+
+OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Define a default set of models to use as a fallback
+# Use only the originally chosen free models; do not include openrouter/auto
+DEFAULT_MODELS = (
+    "openai/gpt-oss-20b:free",
+    "google/gemini-flash-1.5",
+    "moonshotai/kimi-k2:free",
+    "google/gemma-3n-e2b-it:free",
+)
+
+# Define model metadata for the UI
+AVAILABLE_MODELS = (
+    {
+        "id": "openai/gpt-oss-20b:free",
+        "name": "GPT OSS 20B",
+        "description": "Fast and efficient general-purpose model",
+        "provider": "OpenAI"
+    },
+    {
+        "id": "google/gemini-flash-1.5",
+        "name": "Gemini Flash 1.5",
+        "description": "Google's fast and capable model",
+        "provider": "Google"
+    },
+    {
+        "id": "moonshotai/kimi-k2:free",
+        "name": "Kimi K2",
+        "description": "Moonshot AI's conversational model",
+        "provider": "Moonshot AI"
+    },
+    {
+        "id": "google/gemma-3n-e2b-it:free",
+        "name": "Gemma 3 2B IT",
+        "description": "Google's lightweight instruction-tuned model",
+        "provider": "Google"
+    },
+    {
+        "id": "openai/gpt-4o-mini",
+        "name": "GPT-4o Mini",
+        "description": "OpenAI's most capable small model",
+        "provider": "OpenAI"
+    },
+    {
+        "id": "anthropic/claude-3.5-sonnet",
+        "name": "Claude 3.5 Sonnet",
+        "description": "Anthropic's latest and most capable model",
+        "provider": "Anthropic"
+    },
+)
+
+SUGGESTED_QUESTIONS = (
+    "What is the core problem this statement is trying to solve?",
+    "What would be a good tech stack for this problem?",
+    "What are the main challenges I might face implementing this?",
+    "What skills or knowledge would be most important for this problem?",
+    "How complex is this problem for a student team?",
+    "What would be the key deliverables for this problem?",
+    "Are there any specific constraints or requirements mentioned?",
+    "What kind of impact would solving this problem have?",
+)
+
+
+def create_openrouter_client() -> httpx.AsyncClient:
+    """Create the pooled client used for all calls to OpenRouter."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(120.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    )
+
 
 class ChatService:
     """Service for handling chat interactions with OpenRouter."""
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, parallel_race: bool = False):
         """Initialize the chat service with OpenRouter API configuration."""
         if not settings.openrouter_api_key:
             raise ValueError("OPENROUTER_API_KEY environment variable is required")
         
+        # Kept for the life of the service so OpenRouter connections are reused
+        self.client = client or create_openrouter_client()
+        # Race the fallback models against each other instead of in sequence
+        self.parallel_race = parallel_race
         self.api_key = settings.openrouter_api_key
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
-        # OpenRouter recommends sending referer and title headers
-        self.headers = {
+        self.api_url = OPENROUTER_API_URL
+        # OpenRouter recommends sending referer and title headers; built once as
+        # httpx.Headers so they are not re-normalized on every request
+        self.headers = httpx.Headers({
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             # Use configurable/default values to satisfy OpenRouter app attribution
             "HTTP-Referer": os.getenv("OPENROUTER_REFERER", "https://localhost"),
             "X-Title": settings.app_name,
-        }
-        # Define a default set of models to use as a fallback
-        # Use only the originally chosen free models; do not include openrouter/auto
-        self.default_models = [
-            "openai/gpt-oss-20b:free",
-            "google/gemini-flash-1.5",
-            "moonshotai/kimi-k2:free",
-            "google/gemma-3n-e2b-it:free",
-        ]
-        
-        # Define model metadata for the UI
-        self.available_models = [
-            {
-                "id": "openai/gpt-oss-20b:free",
-                "name": "GPT OSS 20B",
-                "description": "Fast and efficient general-purpose model",
-                "provider": "OpenAI"
-            },
-            {
-                "id": "google/gemini-flash-1.5",
-                "name": "Gemini Flash 1.5",
-                "description": "Google's fast and capable model",
-                "provider": "Google"
-            },
-            {
-                "id": "moonshotai/kimi-k2:free",
-                "name": "Kimi K2",
-                "description": "Moonshot AI's conversational model",
-                "provider": "Moonshot AI"
-            },
-            {
-                "id": "google/gemma-3n-e2b-it:free",
-                "name": "Gemma 3 2B IT",
-                "description": "Google's lightweight instruction-tuned model",
-                "provider": "Google"
-            },
-            {
-                "id": "openai/gpt-4o-mini",
-                "name": "GPT-4o Mini",
-                "description": "OpenAI's most capable small model",
-                "provider": "OpenAI"
-            },
-            {
-                "id": "anthropic/claude-3.5-sonnet",
-                "name": "Claude 3.5 Sonnet",
-                "description": "Anthropic's latest and most capable model",
-                "provider": "Anthropic"
-            },
-        ]
+        })
+        self.default_models = DEFAULT_MODELS
+        self.available_models = AVAILABLE_MODELS
         # Set the default model id (first in fallback list)
         self.default_model_id = self.default_models[0]
+        self._models_response = ChatModelsResponse(
+            models=[ChatModel(**model_info) for model_info in self.available_models],
+            default_model=self.default_model_id
+        )
+        # Answers reused for paraphrased questions about the same problem
+        self.response_cache = SemanticChatCache()
+        # Formatted system prompts keyed by a digest of the problem context
+        self._system_prompts: "OrderedDict[bytes, str]" = OrderedDict()
 
     def _validate_context(self, problem_context: str) -> bool:
         """
@@ -89,13 +154,41 @@ class ChatService:
         Returns:
             bool: True if context is valid, False otherwise
         """
-        if not problem_context or len(problem_context.strip()) < 50:
+        if not problem_context or len(problem_context) < 50:
             return False
-        return True
+        # Only pay for a stripped copy when there is surrounding whitespace
+        if not problem_context[0].isspace() and not problem_context[-1].isspace():
+            return True
+        return len(problem_context.strip()) >= 50
+
+    def _system_prompt_for(self, problem_context: str) -> str:
+        """Return the system prompt for a problem, formatting it once per context."""
+        key = hashlib.blake2b(problem_context.encode(), digest_size=16).digest()
+        prompt = self._system_prompts.get(key)
+        if prompt is None:
+            prompt = "".join((SYSTEM_PROMPT_PREFIX, problem_context, SYSTEM_PROMPT_SUFFIX))
+            self._system_prompts[key] = prompt
+            if len(self._system_prompts) > SYSTEM_PROMPT_CACHE_SIZE:
+                self._system_prompts.popitem(last=False)
+        else:
+            self._system_prompts.move_to_end(key)
+        return prompt
+
+    def _build_payload(self, problem_context: str, user_question: str, model: str, stream: bool) -> Dict:
+        """Build the OpenRouter request payload for a question about a problem."""
+        return {
+            # Use the specified model or fall back to the default list
+            "models": [model] if model else self.default_models,
+            "messages": [
+                {"role": "system", "content": self._system_prompt_for(problem_context)},
+                {"role": "user", "content": f"Question: {user_question}"}
+            ],
+            "stream": stream,
+        }
 
     async def generate_response(self, problem_context: str, user_question: str, model: str = None) -> str:
         """
-        Generates a non-streaming response from OpenRouter by collecting chunks.
+        Generates a non-streaming response from OpenRouter in a single request.
 
         Args:
             problem_context: The full context of the problem statement.
@@ -111,14 +204,21 @@ class ChatService:
         if not self._validate_context(problem_context):
             raise ValueError("Invalid or insufficient problem context provided")
 
-        full_response = []
+        payload = self._build_payload(problem_context, user_question, model, stream=False)
+        cache_model = payload["models"][0]
+
+        embedding = await asyncio.to_thread(self.response_cache.embed, user_question)
+        cached = self.response_cache.lookup(embedding, problem_context, cache_model)
+        if cached is not None:
+            return cached
+
         try:
-            async for chunk in self.generate_streaming_response(problem_context, user_question, model):
-                full_response.append(chunk)
-            return "".join(full_response)
+            response_text = await self._call_openrouter_async(payload)
         except Exception as e:
             logger.error(f"Failed to generate non-streaming chat response: {str(e)}")
             raise ChatServiceError(f"Failed to generate response: {str(e)}")
+        self.response_cache.store(embedding, problem_context, cache_model, response_text)
+        return response_text
 
     async def generate_streaming_response(
         self,
@@ -140,43 +240,68 @@ class ChatService:
         Raises:
             ChatServiceError: If the chat generation fails.
         """
-        system_prompt = (
-            """You are an AI assistant helping engineering students understand Smart India Hackathon problem statements. 
+        payload = self._build_payload(problem_context, user_question, model, stream=True)
+        models_to_use = payload["models"]
 
-IMPORTANT CONSTRAINTS:
-- You can ONLY answer questions about the specific problem statement provided in the context
-- If information is not available in the problem context, explicitly state \"This information is not available in the problem statement\"
-- Do not make assumptions or provide information not present in the context
-- Keep responses focused, practical, and helpful for students evaluating this problem
-- Suggest possible approaches, tech stacks, or considerations based only on what's described in the problem
+        # Serve paraphrases of an already answered question from the cache
+        embedding = await asyncio.to_thread(self.response_cache.embed, user_question)
+        cached = self.response_cache.lookup(embedding, problem_context, models_to_use[0])
+        if cached is not None:
+            for i in range(0, len(cached), CACHED_CHUNK_SIZE):
+                yield cached[i:i + CACHED_CHUNK_SIZE]
+            return
 
-PROBLEM CONTEXT:
-{problem_context}
-
-Please answer the following question about this specific problem statement:"""
-        )
-        
-        messages = [
-            {"role": "system", "content": system_prompt.format(problem_context=problem_context)},
-            {"role": "user", "content": f"Question: {user_question}"}
-        ]
-
-        # Use the specified model or fall back to the default list
-        models_to_use = [model] if model else self.default_models
-
-        payload = {
-            "models": models_to_use,
-            "messages": messages,
-            "stream": True,
-        }
+        # Model whose answer is streamed back, and so the key it is cached under
+        answered_by = {}
+        if self.parallel_race and len(models_to_use) > 1:
+            stream = self._race_openrouter_streams(
+                [{**payload, "models": [m]} for m in models_to_use], answered_by
+            )
+        else:
+            answered_by["model"] = models_to_use[0]
+            stream = self._call_openrouter_streaming_async(payload)
 
+        collected = []
         try:
-            async for chunk in self._call_openrouter_streaming_async(payload):
+            async for chunk in stream:
+                collected.append(chunk)
                 yield chunk
+            if "model" in answered_by:
+                self.response_cache.store(embedding, problem_context, answered_by["model"], "".join(collected))
         except Exception as e:
             logger.error(f"Failed to generate streaming chat response: {str(e)}")
             raise ChatServiceError(f"Failed to generate streaming response: {str(e)}")
+        finally:
+            # Close the upstream stream now when the caller stops early, rather
+            # than leaving it suspended until the event loop finalizes it
+            await stream.aclose()
+
 
+    async def _call_openrouter_async(self, payload: Dict) -> str:
+        """
+        Makes a single non-streaming call to the OpenRouter API.
+
+        Args:
+            payload: The request payload for the OpenRouter API.
+
+        Returns:
+            str: The content of the first completion choice.
+
+        Raises:
+            Exception: If the API call fails.
+        """
+        try:
+            response = await self.client.post(
+                self.api_url, headers=self.headers, content=orjson.dumps(payload)
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)["choices"][0]["message"]["content"] or ""
+        except httpx.HTTPStatusError as e:
+            logger.error(f"OpenRouter API call failed with status {e.response.status_code}")
+            raise
+        except Exception as e:
+            logger.error(f"OpenRouter API call failed: {str(e)}")
+            raise
 
     async def _call_openrouter_streaming_async(self, payload: Dict) -> AsyncGenerator[str, None]:
         """
@@ -191,49 +316,114 @@ Please answer the following question about this specific problem statement:"""
         Raises:
             Exception: If the API call fails.
         """
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        try:
+            async with self.client.stream(
+                "POST", self.api_url, headers=self.headers, content=orjson.dumps(payload)
+            ) as response:
+                response.raise_for_status()
+                # Split SSE lines on raw bytes and hand payloads straight to orjson
+                buffer = bytearray()
+                async for data in response.aiter_bytes():
+                    buffer += data
+                    while (newline := buffer.find(b"\n")) >= 0:
+                        line = bytes(buffer[:newline])
+                        del buffer[:newline + 1]
+                        if not line.startswith(b"data:"):
+                            continue
+                        data_bytes = line[5:].strip()
+                        if data_bytes == b"[DONE]":
+                            return
+                        try:
+                            chunk_data = orjson.loads(data_bytes)
+                        except orjson.JSONDecodeError:
+                            logger.warning(f"Received non-JSON data from stream: {data_bytes!r}")
+                            continue
+                        content = chunk_data.get("choices", [{}])[0].get("delta", {}).get("content")
+                        if content:
+                            yield content
+        except httpx.HTTPStatusError as e:
+            # Avoid reading the streaming body again; log status and reason only
+            status = e.response.status_code if e.response is not None else "unknown"
+            logger.error(f"OpenRouter API call failed with status {status}")
+            raise
+        except Exception as e:
+            logger.error(f"OpenRouter streaming API call failed: {str(e)}")
+            raise
+
+    async def _race_openrouter_streams(
+        self, payloads: List[Dict], winner_info: Optional[Dict[str, str]] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        Streams every payload at once and relays the first one to produce content.
+
+        The remaining streams are cancelled as soon as a winner yields its
+        first chunk. If every stream fails before producing content, the last
+        error is raised.
+
+        Args:
+            payloads: One OpenRouter payload per model.
+            winner_info: If given, its "model" key is set to the winning model.
+
+        Yields:
+            AsyncGenerator[str, None]: Response chunks from the winning model.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump(index: int, payload: Dict) -> None:
             try:
-                async with client.stream("POST", self.api_url, headers=self.headers, json=payload) as response:
-                    response.raise_for_status()
-                    async for line in response.aiter_lines():
-                        if line.startswith("data:"):
-                            data_str = line[len("data: "):]
-                            if data_str.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk_data = json.loads(data_str)
-                                content = chunk_data.get("choices", [{}])[0].get("delta", {}).get("content")
-                                if content:
-                                    yield content
-                            except json.JSONDecodeError:
-                                logger.warning(f"Received non-JSON data from stream: {data_str}")
-                                continue
-            except httpx.HTTPStatusError as e:
-                # Avoid reading the streaming body again; log status and reason only
-                status = e.response.status_code if e.response is not None else "unknown"
-                logger.error(f"OpenRouter API call failed with status {status}")
-                raise
+                async for chunk in self._call_openrouter_streaming_async(payload):
+                    await queue.put((index, chunk))
+                await queue.put((index, None))
             except Exception as e:
-                logger.error(f"OpenRouter streaming API call failed: {str(e)}")
-                raise
+                await queue.put((index, e))
 
-    def get_suggested_questions(self) -> list[str]:
+        tasks = [asyncio.create_task(pump(i, p)) for i, p in enumerate(payloads)]
+        winner = None
+        remaining = len(tasks)
+        error = None
+        try:
+            while True:
+                index, item = await queue.get()
+                if winner is None:
+                    if isinstance(item, str):
+                        winner = index
+                        if winner_info is not None:
+                            winner_info["model"] = payloads[winner]["models"][0]
+                        for i, task in enumerate(tasks):
+                            if i != winner:
+                                task.cancel()
+                        yield item
+                        continue
+                    # A model finished or failed without producing content
+                    remaining -= 1
+                    if isinstance(item, Exception):
+                        error = item
+                    if remaining == 0:
+                        if error is not None:
+                            raise error
+                        return
+                elif index == winner:
+                    if item is None:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        """Close the pooled OpenRouter client."""
+        await self.client.aclose()
+
+    def get_suggested_questions(self) -> tuple[str, ...]:
         """
-        Get a list of suggested questions for users to ask about problem statements.
+        Get the suggested questions for users to ask about problem statements.
         
         Returns:
-            list[str]: List of suggested questions
+            tuple[str, ...]: Suggested questions
         """
-        return [
-            "What is the core problem this statement is trying to solve?",
-            "What would be a good tech stack for this problem?",
-            "What are the main challenges I might face implementing this?",
-            "What skills or knowledge would be most important for this problem?",
-            "How complex is this problem for a student team?",
-            "What would be the key deliverables for this problem?",
-            "Are there any specific constraints or requirements mentioned?",
-            "What kind of impact would solving this problem have?"
-        ]
+        return SUGGESTED_QUESTIONS
 
     def get_available_models(self) -> ChatModelsResponse:
         """
@@ -242,24 +432,21 @@ Please answer the following question about this specific problem statement:"""
         Returns:
             ChatModelsResponse: List of available models with metadata
         """
-        models = [ChatModel(**model_info) for model_info in self.available_models]
-        return ChatModelsResponse(
-            models=models,
-            default_model=self.default_model_id
-        )
+        return self._models_response
 
 class ChatServiceError(Exception):
     """Custom exception for chat service errors."""
     pass
 
 
-# Global chat service instance - initialized lazily
-_chat_service_instance = None
-
-
+# Global chat service instance - created lazily on first call and then reused
+@lru_cache(maxsize=1)
 def get_chat_service() -> ChatService:
     """Get or create the global chat service instance."""
-    global _chat_service_instance
-    if _chat_service_instance is None:
-        _chat_service_instance = ChatService()
-    return _chat_service_instance
+    return ChatService(parallel_race=settings.chat_parallel_race)
+
+
+async def close_chat_service() -> None:
+    """Close the global chat service's client, if the service was ever created."""
+    if get_chat_service.cache_info().currsize:
+        await get_chat_service().aclose()
@@ -2,20 +2,86 @@
 Dashboard service for analytics and statistics generation.
 Provides aggregated data for dashboard visualizations including categories, keywords, and organizations.
 """
-import json
 import logging
+import os
 import re
+import tempfile
+import time
 from collections import Counter, defaultdict
-from typing import List, Dict, Any, Tuple, Optional
-from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Any, Tuple, Optional
 import asyncio
 
-import chromadb
+import orjson
+
 from ..models import DashboardStats
 from ..config import settings
+from .metadata import parse_technology_stack
 
 logger = logging.getLogger(__name__)
 
+# Problems fetched per ChromaDB request, and requests in flight at once
+FETCH_BATCH_SIZE = 1000
+FETCH_CONCURRENCY = 8
+
+# Leading ids sampled into the collection fingerprint
+FINGERPRINT_PEEK_SIZE = 5
+
+# Cached stats are regenerated after this long even if the fingerprint is
+# unchanged, since in-place updates (upserts, metadata edits) do not move it
+CACHE_MAX_AGE_SECONDS = 6 * 60 * 60
+
+# Stats file shared by worker processes, inside settings.dashboard_cache_dir
+SHARED_STATS_FILE = "dashboard_stats.json"
+
+# Common stop words to filter from keywords
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after',
+    'above', 'below', 'between', 'among', 'is', 'are', 'was', 'were', 'be', 'been',
+    'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
+    'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
+    'my', 'your', 'his', 'her', 'its', 'our', 'their', 'system', 'using', 'based',
+    'develop', 'create', 'build', 'implement', 'application', 'platform', 'solution'
+})
+
+# Common variations of technology names mapped to standard names
+TECH_MAPPING = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'react.js': 'react',
+    'vue.js': 'vue',
+    'node.js': 'nodejs',
+    'express.js': 'express',
+    'next.js': 'nextjs',
+    'tensorflow': 'tensorflow',
+    'pytorch': 'pytorch',
+    'scikit-learn': 'sklearn',
+    'opencv': 'opencv',
+    'postgresql': 'postgres',
+    'mongodb': 'mongo',
+    'mysql': 'mysql',
+    'redis': 'redis',
+    'docker': 'docker',
+    'kubernetes': 'k8s',
+    'aws': 'aws',
+    'azure': 'azure',
+    'gcp': 'gcp'
+}
+
+# Keywords that are likely to be technologies, including the standard names
+# technology stacks are normalized to
+TECH_INDICATORS = frozenset({
+    'python', 'javascript', 'java', 'react', 'nodejs', 'django', 'flask',
+    'tensorflow', 'pytorch', 'opencv', 'mysql', 'postgres', 'mongodb',
+    'docker', 'kubernetes', 'aws', 'azure', 'blockchain', 'ai', 'ml',
+    'machine', 'learning', 'deep', 'neural', 'iot', 'arduino', 'raspberry'
+}) | frozenset(TECH_MAPPING.values())
+
+# Words of 3+ letters counted as keywords
+KEYWORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
 
 class DashboardServiceError(Exception):
     """Custom exception for dashboard service errors."""
@@ -32,22 +98,14 @@ class DashboardService:
         self.collection = None
         self._initialized = False
         
-        # In-memory cache for dashboard data
+        # In-memory cache for dashboard data, valid while the collection
+        # fingerprint it was generated from is unchanged, up to a maximum age
         self._cache = {}
-        self._cache_timestamp = None
-        self._cache_ttl = timedelta(minutes=15)  # Cache for 15 minutes
-        
-        # Common stop words to filter from keywords
-        self._stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-            'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after',
-            'above', 'below', 'between', 'among', 'is', 'are', 'was', 'were', 'be', 'been',
-            'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
-            'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
-            'my', 'your', 'his', 'her', 'its', 'our', 'their', 'system', 'using', 'based',
-            'develop', 'create', 'build', 'implement', 'application', 'platform', 'solution'
-        }
+        self._cache_fingerprint: Optional[Tuple[int, Tuple[str, ...]]] = None
+        self._cache_generated_at = 0.0
+        # Fingerprint seen by the latest get_dashboard_stats call
+        self._last_fingerprint: Optional[Tuple[int, Tuple[str, ...]]] = None
+        self._refresh_lock = asyncio.Lock()
     
     async def initialize(self) -> None:
         """Initialize ChromaDB connection."""
@@ -69,6 +127,8 @@ class DashboardService:
     
     async def _connect_to_chromadb(self) -> None:
         """Connect to ChromaDB and get the collection."""
+        import chromadb
+        
         try:
             logger.info(f"Connecting to ChromaDB at {settings.chroma_host}:{settings.chroma_port}")
             self.chroma_client = chromadb.HttpClient(
@@ -90,170 +150,193 @@ class DashboardService:
             logger.error(f"Failed to connect to ChromaDB: {str(e)}")
             raise DashboardServiceError(f"ChromaDB connection failed: {str(e)}")
     
-    def _is_cache_valid(self) -> bool:
-        """Check if the cache is still valid."""
-        if not self._cache_timestamp:
-            return False
-        return datetime.now() - self._cache_timestamp < self._cache_ttl
+    async def _collection_fingerprint(self) -> Tuple[int, Tuple[str, ...]]:
+        """
+        Cheap change marker for the collection: its count plus the leading ids.
+        
+        Adding or deleting problems changes one or the other, so new ingests
+        show up on the next request. Updates in place (upserts of existing
+        ids, metadata edits) leave it unchanged; CACHE_MAX_AGE_SECONDS bounds
+        how long those go unnoticed.
+        """
+        count, peek = await asyncio.gather(
+            asyncio.to_thread(self.collection.count),
+            asyncio.to_thread(self.collection.peek, limit=FINGERPRINT_PEEK_SIZE)
+        )
+        return count, tuple(peek["ids"])
+    
+    @staticmethod
+    def _is_fresh(generated_at: float) -> bool:
+        """Check if data generated at ``generated_at`` is younger than the maximum cache age."""
+        return time.time() - generated_at < CACHE_MAX_AGE_SECONDS
+    
+    def _is_cache_valid(self, fingerprint: Optional[Tuple[int, Tuple[str, ...]]]) -> bool:
+        """Check if the cache is fresh and was generated from a collection with this fingerprint."""
+        return (
+            "stats" in self._cache
+            and self._cache_fingerprint == fingerprint
+            and self._is_fresh(self._cache_generated_at)
+        )
     
-    def _extract_keywords_from_text(self, text: str, min_length: int = 3) -> List[str]:
-        """Extract meaningful keywords from text."""
-        if not text:
-            return []
+    def _read_shared_stats(self, fingerprint: Tuple[int, Tuple[str, ...]]) -> Optional[Tuple[DashboardStats, float]]:
+        """
+        Load stats another worker process generated for this fingerprint.
         
-        # Convert to lowercase and extract words
-        words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
+        Returns the stats and when they were generated, or None when the
+        shared cache is disabled, missing, unreadable, too old or was
+        generated from a different collection state.
+        """
+        if not settings.dashboard_cache_dir:
+            return None
         
-        # Filter out stop words and short words
-        keywords = [
-            word for word in words 
-            if len(word) >= min_length and word not in self._stop_words
-        ]
+        path = os.path.join(settings.dashboard_cache_dir, SHARED_STATS_FILE)
+        try:
+            with open(path, "rb") as f:
+                entry = orjson.loads(f.read())
+            count, ids = entry["fingerprint"]
+            generated_at = entry.get("generated_at", 0.0)
+            if (count, tuple(ids)) != fingerprint or not self._is_fresh(generated_at):
+                return None
+            return DashboardStats.model_validate(entry["stats"]), generated_at
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable shared dashboard stats: {str(e)}")
+            return None
+    
+    def _write_shared_stats(
+        self, fingerprint: Tuple[int, Tuple[str, ...]], stats: DashboardStats, generated_at: float
+    ) -> None:
+        """Publish stats for other worker processes; failures only cost them a recompute."""
+        directory = settings.dashboard_cache_dir
+        if not directory:
+            return
         
-        return keywords
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write then rename, so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(orjson.dumps({
+                        "fingerprint": fingerprint,
+                        "generated_at": generated_at,
+                        "stats": stats.model_dump()
+                    }))
+                os.replace(tmp_path, os.path.join(directory, SHARED_STATS_FILE))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Failed to write shared dashboard stats: {str(e)}")
     
-    def _extract_tech_keywords(self, tech_stack: List[str]) -> List[str]:
-        """Extract and normalize technology keywords."""
-        tech_keywords = []
+    async def _fetch_all_problem_data(
+        self, include: Tuple[str, ...] = ("metadatas", "documents")
+    ) -> Dict[str, List[Any]]:
+        """
+        Fetch all problem statement data from ChromaDB.
         
-        for tech in tech_stack:
-            if not tech:
-                continue
-                
-            # Normalize common technology names
-            tech_lower = tech.lower().strip()
-            
-            # Map common variations to standard names
-            tech_mapping = {
-                'js': 'javascript',
-                'ts': 'typescript',
-                'py': 'python',
-                'react.js': 'react',
-                'vue.js': 'vue',
-                'node.js': 'nodejs',
-                'express.js': 'express',
-                'next.js': 'nextjs',
-                'tensorflow': 'tensorflow',
-                'pytorch': 'pytorch',
-                'scikit-learn': 'sklearn',
-                'opencv': 'opencv',
-                'postgresql': 'postgres',
-                'mongodb': 'mongo',
-                'mysql': 'mysql',
-                'redis': 'redis',
-                'docker': 'docker',
-                'kubernetes': 'k8s',
-                'aws': 'aws',
-                'azure': 'azure',
-                'gcp': 'gcp'
-            }
-            
-            normalized_tech = tech_mapping.get(tech_lower, tech_lower)
-            tech_keywords.append(normalized_tech)
+        Args:
+            include: Columns to fetch besides the ids; leave out "documents"
+                when only metadata is needed, as they are by far the largest
         
-        return tech_keywords
-    
-    async def _fetch_all_problem_data(self) -> List[Dict[str, Any]]:
-        """Fetch all problem statement data from ChromaDB."""
+        Returns:
+            Parallel "ids" and ``include`` lists, in the column-oriented
+            shape ChromaDB itself returns
+        """
         try:
             # Get total count
-            total_count = self.collection.count()
+            total_count = await asyncio.to_thread(self.collection.count)
             logger.info(f"Fetching {total_count} problem statements for analytics")
             
-            # Fetch all data in batches to avoid memory issues
-            batch_size = 1000
-            all_data = []
+            # Fetch all data in batches to avoid memory issues; the blocking
+            # HTTP client calls run concurrently in worker threads
+            batch_size = FETCH_BATCH_SIZE
+            semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
             
-            for offset in range(0, total_count, batch_size):
-                batch_results = self.collection.get(
-                    limit=min(batch_size, total_count - offset),
-                    offset=offset,
-                    include=["metadatas", "documents"]
-                )
-                
-                if batch_results["ids"]:
-                    for i, doc_id in enumerate(batch_results["ids"]):
-                        metadata = batch_results["metadatas"][i] if batch_results["metadatas"] else {}
-                        document = batch_results["documents"][i] if batch_results["documents"] else ""
-                        
-                        all_data.append({
-                            "id": doc_id,
-                            "metadata": metadata,
-                            "document": document
-                        })
+            async def fetch_batch(offset: int) -> Dict[str, Any]:
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        self.collection.get,
+                        limit=min(batch_size, total_count - offset),
+                        offset=offset,
+                        include=list(include)
+                    )
+            
+            batches = await asyncio.gather(
+                *(fetch_batch(offset) for offset in range(0, total_count, batch_size))
+            )
+            
+            problem_data: Dict[str, List[Any]] = {"ids": []}
+            placeholders = {"metadatas": {}, "documents": ""}
+            for column in include:
+                problem_data[column] = []
+            
+            for batch_results in batches:
+                batch_ids = batch_results["ids"]
+                if batch_ids:
+                    problem_data["ids"].extend(batch_ids)
+                    for column in include:
+                        problem_data[column].extend(
+                            batch_results[column] or [placeholders.get(column)] * len(batch_ids)
+                        )
             
-            logger.info(f"Successfully fetched {len(all_data)} problem statements")
-            return all_data
+            logger.info(f"Successfully fetched {len(problem_data['ids'])} problem statements")
+            return problem_data
             
         except Exception as e:
             logger.error(f"Failed to fetch problem data: {str(e)}")
             raise DashboardServiceError(f"Failed to fetch problem data: {str(e)}")
     
-    def _analyze_categories(self, problem_data: List[Dict[str, Any]]) -> Dict[str, int]:
+    def _analyze_categories(self, problem_data: Dict[str, List[Any]]) -> Dict[str, int]:
         """Analyze problem statements by category."""
-        categories = Counter()
-        
-        for item in problem_data:
-            metadata = item.get("metadata", {})
-            category = metadata.get("category", "Unknown").strip()
-            if category:
-                categories[category] += 1
+        # Counter tallies the generator in C; blank categories are dropped after
+        categories = Counter(
+            metadata.get("category", "Unknown").strip() for metadata in problem_data["metadatas"]
+        )
+        categories.pop("", None)
         
         return dict(categories)
     
-    def _analyze_organizations(self, problem_data: List[Dict[str, Any]]) -> Dict[str, int]:
+    def _analyze_organizations(self, problem_data: Dict[str, List[Any]]) -> Dict[str, int]:
         """Analyze problem statements by organization."""
-        organizations = Counter()
-        
-        for item in problem_data:
-            metadata = item.get("metadata", {})
-            organization = metadata.get("organization", "Unknown").strip()
-            if organization:
-                organizations[organization] += 1
+        organizations = Counter(
+            metadata.get("organization", "Unknown").strip() for metadata in problem_data["metadatas"]
+        )
+        organizations.pop("", None)
         
         return dict(organizations)
     
-    def _analyze_keywords(self, problem_data: List[Dict[str, Any]], top_n: int = 50) -> List[Tuple[str, int]]:
+    def _analyze_keywords(self, problem_data: Dict[str, List[Any]], top_n: int = 50) -> List[Tuple[str, int]]:
         """Analyze and extract top keywords from problem statements."""
-        all_keywords = Counter()
         tech_keywords = Counter()
+        # Titles and descriptions of every problem, tokenized in one pass below
+        texts: List[str] = []
         
-        for item in problem_data:
-            metadata = item.get("metadata", {})
-            document = item.get("document", "")
-            
+        for metadata, document in zip(problem_data["metadatas"], problem_data["documents"]):
             # Extract keywords from title and description
-            title = metadata.get("title", "")
-            description_text = ""
+            texts.append(metadata.get("title", ""))
             
             # Extract description from document if available
             if document:
-                lines = document.split('\n')
+                lines = document.split('\n', 2)
                 if len(lines) >= 2:
-                    description_text = lines[1]  # Second line should be description
-            
-            # Combine title and description for keyword extraction
-            combined_text = f"{title} {description_text}"
-            text_keywords = self._extract_keywords_from_text(combined_text)
-            all_keywords.update(text_keywords)
-            
-            # Extract technology keywords
-            tech_stack_str = metadata.get("technology_stack", "[]")
-            try:
-                tech_stack = json.loads(tech_stack_str) if tech_stack_str else []
-            except (json.JSONDecodeError, TypeError):
-                tech_stack = []
+                    texts.append(lines[1])  # Second line should be description
             
+            # Extract technology keywords, normalizing common technology names
+            tech_stack = parse_technology_stack(metadata.get("technology_stack"))
             if tech_stack:
-                tech_keywords_list = self._extract_tech_keywords(tech_stack)
-                tech_keywords.update(tech_keywords_list)
-        
-        # Combine text keywords and tech keywords, giving more weight to tech keywords
-        combined_keywords = Counter()
+                tech_keywords.update(
+                    TECH_MAPPING.get(tech_lower, tech_lower)
+                    for tech_lower in (tech.lower().strip() for tech in tech_stack if tech)
+                )
         
-        # Add text keywords
-        for keyword, count in all_keywords.items():
-            combined_keywords[keyword] = count
+        # One regex scan over the whole corpus instead of one per problem; the
+        # newline separators keep words from neighbouring texts apart. Stop
+        # words are dropped once per distinct word rather than per occurrence.
+        combined_keywords = Counter(KEYWORD_RE.findall("\n".join(texts).lower()))
+        for stop_word in STOP_WORDS.intersection(combined_keywords):
+            del combined_keywords[stop_word]
         
         # Add tech keywords with higher weight
         for keyword, count in tech_keywords.items():
@@ -262,7 +345,7 @@ class DashboardService:
         # Return top N keywords
         return combined_keywords.most_common(top_n)
     
-    def _generate_dashboard_stats(self, problem_data: List[Dict[str, Any]]) -> DashboardStats:
+    def _generate_dashboard_stats(self, problem_data: Dict[str, List[Any]]) -> DashboardStats:
         """Generate comprehensive dashboard statistics."""
         logger.info("Generating dashboard statistics...")
         
@@ -280,7 +363,7 @@ class DashboardService:
         logger.info(f"Extracted {len(top_keywords)} top keywords")
         
         # Calculate total problems
-        total_problems = len(problem_data)
+        total_problems = len(problem_data["ids"])
         
         return DashboardStats(
             categories=categories,
@@ -306,31 +389,51 @@ class DashboardService:
             await self.initialize()
         
         try:
+            fingerprint = self._last_fingerprint = await self._collection_fingerprint()
+            
             # Check cache first (unless force refresh is requested)
-            if not force_refresh and self._is_cache_valid() and "stats" in self._cache:
+            if not force_refresh and self._is_cache_valid(fingerprint):
                 logger.info("Returning cached dashboard statistics")
                 return self._cache["stats"]
             
-            logger.info("Generating fresh dashboard statistics...")
-            
-            # Fetch all problem data
-            problem_data = await self._fetch_all_problem_data()
-            
-            if not problem_data:
-                logger.warning("No problem data found for dashboard analytics")
-                return DashboardStats(
-                    categories={},
-                    top_keywords=[],
-                    top_organizations={},
-                    total_problems=0
-                )
-            
-            # Generate statistics
-            stats = self._generate_dashboard_stats(problem_data)
-            
-            # Update cache
-            self._cache["stats"] = stats
-            self._cache_timestamp = datetime.now()
+            # Concurrent cache misses share one refresh: later callers wait for
+            # the first and then find its result in the cache
+            async with self._refresh_lock:
+                if not force_refresh and self._is_cache_valid(fingerprint):
+                    logger.info("Returning dashboard statistics generated by a concurrent request")
+                    return self._cache["stats"]
+                
+                # Another worker process may already have generated these stats
+                if not force_refresh:
+                    shared = await asyncio.to_thread(self._read_shared_stats, fingerprint)
+                    if shared is not None:
+                        logger.info("Returning dashboard statistics shared by another worker")
+                        self._cache["stats"], self._cache_generated_at = shared
+                        self._cache_fingerprint = fingerprint
+                        return self._cache["stats"]
+                
+                logger.info("Generating fresh dashboard statistics...")
+                
+                # Fetch all problem data
+                problem_data = await self._fetch_all_problem_data()
+                
+                if not problem_data["ids"]:
+                    logger.warning("No problem data found for dashboard analytics")
+                    return DashboardStats(
+                        categories={},
+                        top_keywords=[],
+                        top_organizations={},
+                        total_problems=0
+                    )
+                
+                # Generate statistics
+                stats = self._generate_dashboard_stats(problem_data)
+                
+                # Update cache
+                self._cache["stats"] = stats
+                self._cache_fingerprint = fingerprint
+                self._cache_generated_at = time.time()
+                await asyncio.to_thread(self._write_shared_stats, fingerprint, stats, self._cache_generated_at)
             
             logger.info(f"Dashboard statistics generated successfully: {stats.total_problems} problems analyzed")
             return stats
@@ -339,16 +442,28 @@ class DashboardService:
             logger.error(f"Failed to generate dashboard statistics: {str(e)}")
             raise DashboardServiceError(f"Dashboard statistics generation failed: {str(e)}")
     
-    async def get_category_breakdown(self) -> Dict[str, Any]:
-        """Get detailed category breakdown with percentages."""
-        stats = await self.get_dashboard_stats()
+    def _derived_view(self, name: str, stats: DashboardStats, build: Callable[[DashboardStats], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return ``build(stats)``, memoized for as long as ``stats`` is current.
         
-        total = stats.total_problems
+        The endpoints derived from the stats are served from the same cached
+        stats object, so their views only need computing once per refresh.
+        """
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] is stats:
+            return cached[1]
+        
+        view = build(stats)
+        self._cache[name] = (stats, view)
+        return view
+    
+    def _build_category_breakdown(self, categories: Dict[str, int], total: int) -> Dict[str, Any]:
+        """Build the category breakdown with percentages."""
         if total == 0:
             return {"categories": {}, "total": 0}
         
         category_breakdown = {}
-        for category, count in stats.categories.items():
+        for category, count in categories.items():
             percentage = (count / total) * 100
             category_breakdown[category] = {
                 "count": count,
@@ -360,23 +475,15 @@ class DashboardService:
             "total": total
         }
     
-    async def get_technology_trends(self) -> Dict[str, Any]:
-        """Get technology trends from the keyword analysis."""
-        stats = await self.get_dashboard_stats()
-        
-        # Filter keywords that are likely to be technologies
-        tech_indicators = {
-            'python', 'javascript', 'java', 'react', 'nodejs', 'django', 'flask',
-            'tensorflow', 'pytorch', 'opencv', 'mysql', 'postgres', 'mongodb',
-            'docker', 'kubernetes', 'aws', 'azure', 'blockchain', 'ai', 'ml',
-            'machine', 'learning', 'deep', 'neural', 'iot', 'arduino', 'raspberry'
-        }
-        
+    def _build_technology_trends(self, stats: DashboardStats) -> Dict[str, Any]:
+        """Split the top keywords into technology and domain keywords."""
         tech_keywords = []
         other_keywords = []
         
+        # Keywords are single lowercase tokens, so an exact lookup is enough
+        # (and, unlike a substring scan, does not file "aim" under "ai")
         for keyword, count in stats.top_keywords:
-            if any(tech in keyword.lower() for tech in tech_indicators):
+            if keyword in TECH_INDICATORS:
                 tech_keywords.append((keyword, count))
             else:
                 other_keywords.append((keyword, count))
@@ -387,10 +494,51 @@ class DashboardService:
             "total_keywords": len(stats.top_keywords)
         }
     
+    async def get_category_breakdown(self) -> Dict[str, Any]:
+        """
+        Get detailed category breakdown with percentages.
+        
+        Reuses the cached dashboard stats when they are current; otherwise
+        only the metadata is fetched, skipping the documents the full stats
+        need for keyword analysis.
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            fingerprint = await self._collection_fingerprint()
+            
+            cached = self._cache.get("category_breakdown")
+            if cached is not None and cached[0] == fingerprint and self._is_fresh(cached[1]):
+                return cached[2]
+            
+            if self._is_cache_valid(fingerprint):
+                stats = self._cache["stats"]
+                categories, total = stats.categories, stats.total_problems
+                generated_at = self._cache_generated_at
+            else:
+                generated_at = time.time()
+                problem_data = await self._fetch_all_problem_data(include=("metadatas",))
+                categories, total = self._analyze_categories(problem_data), len(problem_data["ids"])
+            
+            breakdown = self._build_category_breakdown(categories, total)
+            self._cache["category_breakdown"] = (fingerprint, generated_at, breakdown)
+            return breakdown
+            
+        except Exception as e:
+            logger.error(f"Failed to generate category breakdown: {str(e)}")
+            raise DashboardServiceError(f"Category breakdown generation failed: {str(e)}")
+    
+    async def get_technology_trends(self) -> Dict[str, Any]:
+        """Get technology trends from the keyword analysis."""
+        stats = await self.get_dashboard_stats()
+        return self._derived_view("technology_trends", stats, self._build_technology_trends)
+    
     async def clear_cache(self) -> None:
         """Clear the dashboard cache."""
         self._cache.clear()
-        self._cache_timestamp = None
+        self._cache_fingerprint = None
+        self._cache_generated_at = 0.0
         logger.info("Dashboard cache cleared")
     
     async def health_check(self) -> Dict[str, Any]:
@@ -404,7 +552,7 @@ class DashboardService:
             if not self._initialized:
                 await self.initialize()
             
-            # Test basic functionality
+            # Test basic functionality; the stats call already checked the fingerprint
             stats = await self.get_dashboard_stats()
             
             return {
@@ -415,7 +563,7 @@ class DashboardService:
                 "categories_count": len(stats.categories),
                 "organizations_count": len(stats.top_organizations),
                 "keywords_count": len(stats.top_keywords),
-                "cache_valid": self._is_cache_valid()
+                "cache_valid": self._is_cache_valid(self._last_fingerprint)
             }
             
         except Exception as e:
@@ -428,4 +576,9 @@ class DashboardService:
 
 
 # Global dashboard service instance
-dashboard_service = DashboardService()
\ No newline at end of file
+dashboard_service = DashboardService()
+
+
+def get_dashboard_service() -> DashboardService:
+    """Get the global dashboard service instance (the router's dependency)."""
+    return dashboard_service
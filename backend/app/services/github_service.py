@@ -3,17 +3,61 @@ GitHub integration service for analyzing user repositories and generating recomm
 """
 import asyncio
 import hashlib
-import json
 import re
-from datetime import datetime, timedelta
+from collections import Counter
 from typing import List, Dict, Optional, Set
 from urllib.parse import quote
 
 import httpx
+import orjson
 from fastapi import HTTPException
 
 from ..config import settings
 from ..models import Repository, GitHubProfile, ProblemStatement, SearchResult
+from .cache import TTLCache
+
+# README bytes requested per repository; comfortably more than README_PREVIEW_CHARS
+# characters even for multi-byte UTF-8 text
+README_RANGE = "bytes=0-2047"
+README_PREVIEW_CHARS = 500
+# README requests in flight at once per profile, to stay clear of GitHub's
+# secondary rate limits
+README_CONCURRENCY = 10
+
+# Technology names recognized in repository descriptions and READMEs, matched
+# against lowercased text in a single scan
+TECH_RE = re.compile(
+    r'\b(?:'
+    # Programming languages
+    r'python|javascript|typescript|java|c\+\+|c#|go|rust|kotlin|swift|php|ruby|scala|r\b|matlab|'
+    # Frameworks and libraries
+    r'react(?:-native)?|angular|vue|django|flask|fastapi|express|spring|laravel|rails|tensorflow|pytorch|scikit-learn|pandas|numpy|'
+    # Databases
+    r'mysql|postgresql|mongodb|redis|sqlite|elasticsearch|cassandra|dynamodb|'
+    # Cloud and DevOps
+    r'aws|azure|gcp|docker|kubernetes|jenkins|terraform|ansible|'
+    # Web technologies
+    r'html|css|sass|less|webpack|babel|nodejs|npm|yarn|'
+    # Mobile
+    r'android|ios|flutter|xamarin|'
+    # AI/ML
+    r'machine-learning|deep-learning|neural-network|nlp|computer-vision|opencv'
+    r')\b'
+)
+
+
+def _leading_sentences(text: str, count: int) -> List[str]:
+    """Return the first ``count`` items of ``text.split('.')`` without splitting the rest."""
+    sentences = []
+    start = 0
+    while len(sentences) < count:
+        end = text.find('.', start)
+        if end == -1:
+            sentences.append(text[start:])
+            break
+        sentences.append(text[start:end])
+        start = end + 1
+    return sentences
 
 
 class GitHubService:
@@ -21,13 +65,19 @@ class GitHubService:
     
     def __init__(self):
         self.base_url = "https://api.github.com"
-        self.cache: Dict[str, Dict] = {}
-        self.cache_ttl = timedelta(hours=1)  # Cache for 1 hour to handle rate limits
+        # Profiles cached for 1 hour to handle rate limits
+        self.profile_cache = TTLCache(ttl_seconds=3600, maxsize=100)
+        # README previews by repository full name, stored with their ETag so
+        # unchanged READMEs are revalidated with a 304 instead of re-downloaded
+        self.readme_cache = TTLCache(ttl_seconds=24 * 3600, maxsize=1000)
         
     async def get_github_profile(self, username: str) -> GitHubProfile:
         """
         Fetch and analyze a GitHub user's profile and repositories.
         
+        Profiles are cached per (case-insensitive) username, and concurrent
+        requests for the same user share a single fetch.
+        
         Args:
             username: GitHub username to analyze
             
@@ -37,13 +87,13 @@ class GitHubService:
         Raises:
             HTTPException: If user not found or API error occurs
         """
+        return await self.profile_cache.get_or_load(
+            username.lower(), lambda: self._fetch_github_profile(username)
+        )
+    
+    async def _fetch_github_profile(self, username: str) -> GitHubProfile:
+        """Fetch a profile and its repositories from the GitHub API."""
         try:
-            # Check cache first
-            cache_key = f"profile_{username}"
-            if self._is_cached(cache_key):
-                cached_data = self.cache[cache_key]["data"]
-                return GitHubProfile(**cached_data)
-            
             async with httpx.AsyncClient() as client:
                 # Set up headers with optional GitHub token
                 headers = {"Accept": "application/vnd.github.v3+json"}
@@ -87,29 +137,25 @@ class GitHubService:
                         detail=f"Failed to fetch repositories: {repos_response.status_code}"
                     )
                 
-                repos_data = repos_response.json()
+                repos_data = orjson.loads(repos_response.content)
                 
-                # Process repositories
-                repositories = []
-                for repo_data in repos_data:
-                    if not repo_data.get("fork", False):  # Skip forked repositories
-                        repo = await self._process_repository(client, headers, repo_data)
-                        repositories.append(repo)
+                # Process repositories, fetching their READMEs concurrently
+                readme_slots = asyncio.Semaphore(README_CONCURRENCY)
+                repositories = list(await asyncio.gather(*(
+                    self._process_repository(client, headers, repo_data, readme_slots)
+                    for repo_data in repos_data
+                    if not repo_data.get("fork", False)  # Skip forked repositories
+                )))
                 
                 # Analyze tech stack
                 tech_stack = self._analyze_tech_stack(repositories)
                 
-                profile = GitHubProfile(
+                return GitHubProfile(
                     username=username,
                     repositories=repositories,
                     tech_stack=tech_stack
                 )
                 
-                # Cache the result
-                self._cache_data(cache_key, profile.model_dump())
-                
-                return profile
-                
         except httpx.TimeoutException:
             raise HTTPException(
                 status_code=504,
@@ -125,7 +171,8 @@ class GitHubService:
         self, 
         client: httpx.AsyncClient, 
         headers: Dict[str, str], 
-        repo_data: Dict
+        repo_data: Dict,
+        readme_slots: Optional[asyncio.Semaphore] = None
     ) -> Repository:
         """Process a single repository and extract relevant information."""
         repo_name = repo_data.get("name", "")
@@ -134,9 +181,11 @@ class GitHubService:
         language = repo_data.get("language", "")
         
         # Fetch README content (with error handling)
-        readme_content = await self._fetch_readme(
-            client, headers, repo_data.get("full_name", "")
-        )
+        if readme_slots is None:
+            readme_content = await self._fetch_readme(client, headers, repo_data.get("full_name", ""))
+        else:
+            async with readme_slots:
+                readme_content = await self._fetch_readme(client, headers, repo_data.get("full_name", ""))
         
         return Repository(
             name=repo_name,
@@ -152,21 +201,38 @@ class GitHubService:
         headers: Dict[str, str], 
         full_name: str
     ) -> Optional[str]:
-        """Fetch README content from a repository."""
+        """
+        Fetch the start of a repository's README.
+        
+        The README is requested as raw text and only its first bytes are
+        downloaded, instead of the whole file as base64-encoded JSON.
+        """
         try:
+            cached = self.readme_cache.get(full_name)
+            readme_headers = {
+                **headers,
+                "Accept": "application/vnd.github.v3.raw",
+                "Range": README_RANGE
+            }
+            if cached is not None:
+                readme_headers["If-None-Match"] = cached[0]
+            
             readme_response = await client.get(
                 f"{self.base_url}/repos/{quote(full_name)}/readme",
-                headers=headers,
+                headers=readme_headers,
                 timeout=5.0
             )
             
-            if readme_response.status_code == 200:
-                readme_data = readme_response.json()
-                # GitHub returns base64 encoded content
-                import base64
-                content = base64.b64decode(readme_data.get("content", "")).decode("utf-8")
-                # Return first 500 characters to avoid too much data
-                return content[:500] if content else None
+            if readme_response.status_code == 304 and cached is not None:
+                return cached[1]
+            
+            if readme_response.status_code in (200, 206):
+                # The byte range may end mid-character; drop the partial tail
+                content = readme_response.content.decode("utf-8", errors="ignore")[:README_PREVIEW_CHARS] or None
+                etag = readme_response.headers.get("ETag")
+                if etag:
+                    self.readme_cache.set(full_name, (etag, content))
+                return content
             
         except Exception:
             # If README fetch fails, continue without it
@@ -176,57 +242,33 @@ class GitHubService:
     
     def _analyze_tech_stack(self, repositories: List[Repository]) -> List[str]:
         """Analyze repositories to infer the user's technology stack."""
-        tech_counter: Dict[str, int] = {}
+        tech_counter: Counter = Counter()
         
         # Extract technologies from various sources
         for repo in repositories:
-            # From primary language
+            # From primary language, weighted double
             if repo.language:
-                tech_counter[repo.language] = tech_counter.get(repo.language, 0) + 2
+                tech_counter[repo.language] += 2
             
             # From topics
-            for topic in repo.topics:
-                tech_counter[topic] = tech_counter.get(topic, 0) + 1
+            tech_counter.update(repo.topics)
             
             # From description and README
             text_content = f"{repo.description or ''} {repo.readme_content or ''}"
-            extracted_techs = self._extract_technologies_from_text(text_content)
-            for tech in extracted_techs:
-                tech_counter[tech] = tech_counter.get(tech, 0) + 1
+            tech_counter.update(self._extract_technologies_from_text(text_content))
         
-        # Sort by frequency and return top technologies
-        sorted_techs = sorted(tech_counter.items(), key=lambda x: x[1], reverse=True)
-        return [tech for tech, count in sorted_techs if count >= 1][:20]  # Top 20 technologies
+        # Top 20 technologies by frequency
+        return [tech for tech, _ in tech_counter.most_common(20)]
     
     def _extract_technologies_from_text(self, text: str) -> Set[str]:
         """Extract technology names from text using pattern matching."""
         if not text:
             return set()
         
-        # Common technology patterns
-        tech_patterns = {
-            # Programming languages
-            r'\b(?:python|javascript|typescript|java|c\+\+|c#|go|rust|kotlin|swift|php|ruby|scala|r\b|matlab)\b',
-            # Frameworks and libraries
-            r'\b(?:react|angular|vue|django|flask|fastapi|express|spring|laravel|rails|tensorflow|pytorch|scikit-learn|pandas|numpy)\b',
-            # Databases
-            r'\b(?:mysql|postgresql|mongodb|redis|sqlite|elasticsearch|cassandra|dynamodb)\b',
-            # Cloud and DevOps
-            r'\b(?:aws|azure|gcp|docker|kubernetes|jenkins|terraform|ansible)\b',
-            # Web technologies
-            r'\b(?:html|css|sass|less|webpack|babel|nodejs|npm|yarn)\b',
-            # Mobile
-            r'\b(?:android|ios|flutter|react-native|xamarin)\b',
-            # AI/ML
-            r'\b(?:machine-learning|deep-learning|neural-network|nlp|computer-vision|opencv)\b'
-        }
-        
-        technologies = set()
-        text_lower = text.lower()
-        
-        for pattern in tech_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            technologies.update(matches)
+        technologies = set(TECH_RE.findall(text.lower()))
+        # "react-native" also counts as React
+        if "react-native" in technologies:
+            technologies.add("react")
         
         return technologies
     
@@ -255,21 +297,20 @@ class GitHubService:
         if repo_descriptions:
             dna_parts.append("Projects: " + "; ".join(repo_descriptions))
         
-        # Add topics/interests
-        all_topics = []
-        for repo in profile.repositories:
-            all_topics.extend(repo.topics)
+        # Add topics/interests, deduplicated in first-seen order
+        unique_topics = list(dict.fromkeys(
+            topic for repo in profile.repositories for topic in repo.topics
+        ))
         
-        if all_topics:
-            unique_topics = list(set(all_topics))[:15]  # Top 15 unique topics
-            dna_parts.append(f"Interests: {', '.join(unique_topics)}")
+        if unique_topics:
+            dna_parts.append(f"Interests: {', '.join(unique_topics[:15])}")  # Top 15 unique topics
         
         # Add README content snippets
         readme_snippets = []
         for repo in profile.repositories[:5]:  # Top 5 repos
             if repo.readme_content:
                 # Extract meaningful sentences from README
-                sentences = repo.readme_content.split('.')[:2]  # First 2 sentences
+                sentences = _leading_sentences(repo.readme_content, 2)  # First 2 sentences
                 clean_sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
                 if clean_sentences:
                     readme_snippets.extend(clean_sentences)
@@ -308,31 +349,6 @@ class GitHubService:
         results = await search_service.search(github_dna, limit=20)
         
         return results
-    
-    def _is_cached(self, key: str) -> bool:
-        """Check if data is cached and not expired."""
-        if key not in self.cache:
-            return False
-        
-        cached_time = self.cache[key]["timestamp"]
-        return datetime.now() - cached_time < self.cache_ttl
-    
-    def _cache_data(self, key: str, data: Dict) -> None:
-        """Cache data with timestamp."""
-        self.cache[key] = {
-            "data": data,
-            "timestamp": datetime.now()
-        }
-        
-        # Simple cache cleanup - remove old entries if cache gets too large
-        if len(self.cache) > 100:
-            # Remove oldest entries
-            sorted_items = sorted(
-                self.cache.items(), 
-                key=lambda x: x[1]["timestamp"]
-            )
-            for old_key, _ in sorted_items[:20]:  # Remove oldest 20 entries
-                del self.cache[old_key]
 
 
 # Global service instance
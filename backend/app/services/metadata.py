@@ -0,0 +1,25 @@
+"""
+Helpers for problem statement metadata stored in ChromaDB.
+"""
+from typing import List, Optional
+
+import orjson
+
+
+def parse_technology_stack(value: Optional[str]) -> List[str]:
+    """
+    Split a stored ``technology_stack`` value into technology names.
+
+    Ingestion stores the stack as comma-separated text ("Python, React");
+    collections ingested before that hold a JSON array string, which is
+    still accepted.
+    """
+    if not value or not isinstance(value, str):
+        return []
+    if value.startswith("["):
+        try:
+            stack = orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return []
+        return stack if isinstance(stack, list) else []
+    return [tech.strip() for tech in value.split(",") if tech.strip()]
@@ -1,19 +1,20 @@
 """
 Search service for semantic search functionality using ChromaDB and sentence-transformers.
 """
-import json
 import logging
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-import chromadb
-from sentence_transformers import SentenceTransformer
-
 from ..models import ProblemStatement, SearchResult
 from ..config import settings
+from .metadata import parse_technology_stack
 
 logger = logging.getLogger(__name__)
 
+# Number of query embeddings kept for reuse
+EMBEDDING_CACHE_SIZE = 512
+
 
 class SearchServiceError(Exception):
     """Custom exception for search service errors."""
@@ -31,6 +32,8 @@ class SearchService:
         self.collection = None
         self.sentence_model = None
         self._initialized = False
+        # Recently used query embeddings, most recent last
+        self._embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
     
     async def initialize(self) -> None:
         """Initialize ChromaDB connection and sentence transformer model."""
@@ -40,7 +43,10 @@ class SearchService:
         try:
             logger.info("Initializing search service...")
             
-            # Initialize sentence transformer model
+            # Initialize sentence transformer model (imported here: pulling in
+            # torch takes seconds and is only needed once search is used)
+            from sentence_transformers import SentenceTransformer
+            
             logger.info(f"Loading sentence transformer model: {self.model_name}")
             self.sentence_model = SentenceTransformer(self.model_name)
             
@@ -56,6 +62,8 @@ class SearchService:
     
     async def _connect_to_chromadb(self) -> None:
         """Connect to ChromaDB and get the collection."""
+        import chromadb
+        
         try:
             # Try HTTP client first
             logger.info(f"Connecting to ChromaDB at {settings.chroma_host}:{settings.chroma_port}")
@@ -81,13 +89,7 @@ class SearchService:
     def _convert_metadata_to_problem(self, doc_id: str, metadata: Dict[str, Any], document: str, distance: float) -> SearchResult:
         """Convert ChromaDB metadata to ProblemStatement model."""
         try:
-            # Parse technology stack from JSON string
-            tech_stack = []
-            if metadata.get("technology_stack"):
-                try:
-                    tech_stack = json.loads(metadata["technology_stack"])
-                except (json.JSONDecodeError, TypeError):
-                    tech_stack = []
+            tech_stack = parse_technology_stack(metadata.get("technology_stack"))
             
             # Extract description from document text if not in metadata
             description = metadata.get("description", "")
@@ -131,6 +133,30 @@ class SearchService:
             )
             return SearchResult(problem=problem, similarity_score=0.0)
     
+    def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the vector for recently seen query strings.
+        
+        Repeated queries (health probes, the same GitHub DNA, pagination
+        refreshes) skip the encode call and its tensor/array allocations.
+        """
+        cached = self._embedding_cache.get(query)
+        if cached is not None:
+            self._embedding_cache.move_to_end(query)
+            return cached
+        
+        embeddings = self.sentence_model.encode([query])
+        if hasattr(embeddings, 'tolist'):
+            query_embedding = embeddings[0].tolist()
+        else:
+            # Handle case where embeddings is already a list (e.g., in tests)
+            query_embedding = embeddings[0] if isinstance(embeddings[0], list) else list(embeddings[0])
+        
+        self._embedding_cache[query] = query_embedding
+        if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+        return query_embedding
+    
     async def search(self, query: str, limit: int = 20) -> List[SearchResult]:
         """
         Perform semantic search on problem statements.
@@ -152,12 +178,7 @@ class SearchService:
             logger.info(f"Performing semantic search for query: '{query}' (limit: {limit})")
             
             # Generate query embedding
-            embeddings = self.sentence_model.encode([query])
-            if hasattr(embeddings, 'tolist'):
-                query_embedding = embeddings[0].tolist()
-            else:
-                # Handle case where embeddings is already a list (e.g., in tests)
-                query_embedding = embeddings[0] if isinstance(embeddings[0], list) else list(embeddings[0])
+            query_embedding = self._embed_query(query)
             
             # Perform vector similarity search
             results = self.collection.query(
@@ -167,17 +188,7 @@ class SearchService:
             )
             
             # Convert results to SearchResult objects
-            search_results = []
-            
-            if results["ids"] and results["ids"][0]:
-                for doc_id, metadata, document, distance in zip(
-                    results["ids"][0],
-                    results["metadatas"][0],
-                    results["documents"][0],
-                    results["distances"][0]
-                ):
-                    search_result = self._convert_metadata_to_problem(doc_id, metadata, document, distance)
-                    search_results.append(search_result)
+            search_results = self._convert_query_results(results, 0)
             
             logger.info(f"Found {len(search_results)} results for query: '{query}'")
             return search_results
@@ -186,6 +197,65 @@ class SearchService:
             logger.error(f"Search failed for query '{query}': {str(e)}")
             raise SearchServiceError(f"Search operation failed: {str(e)}")
     
+    def _convert_query_results(self, results: Dict[str, Any], index: int, limit: Optional[int] = None) -> List[SearchResult]:
+        """Convert the hits for query ``index`` of a ChromaDB query into SearchResults."""
+        if not results["ids"] or not results["ids"][index]:
+            return []
+        hits = zip(
+            results["ids"][index],
+            results["metadatas"][index],
+            results["documents"][index],
+            results["distances"][index]
+        )
+        return [
+            self._convert_metadata_to_problem(doc_id, metadata, document, distance)
+            for doc_id, metadata, document, distance in list(hits)[:limit]
+        ]
+    
+    async def search_many(self, queries: List[str], limits: List[int]) -> List[List[SearchResult]]:
+        """
+        Perform semantic search for several queries at once.
+        
+        All queries are embedded in one encode call (sentence-transformers
+        sorts inputs by length so each minibatch is only padded to its own
+        longest query) and sent to ChromaDB as a single KNN query.
+        
+        Args:
+            queries: Natural language search queries
+            limits: Maximum number of results for each query
+            
+        Returns:
+            One list of SearchResult objects per query, in input order
+            
+        Raises:
+            SearchServiceError: If search fails
+        """
+        if not queries:
+            return []
+        if not self._initialized:
+            await self.initialize()
+        
+        try:
+            logger.info(f"Performing batched semantic search for {len(queries)} queries")
+            
+            embeddings = self.sentence_model.encode(queries, batch_size=32)
+            query_embeddings = embeddings.tolist() if hasattr(embeddings, 'tolist') else [list(e) for e in embeddings]
+            
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=min(max(limits), 100),  # Cap at 100 for performance
+                include=["metadatas", "documents", "distances"]
+            )
+            
+            return [
+                self._convert_query_results(results, i, limit)
+                for i, limit in enumerate(limits)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Batched search failed for {len(queries)} queries: {str(e)}")
+            raise SearchServiceError(f"Search operation failed: {str(e)}")
+    
     async def get_problem_by_id(self, problem_id: str) -> Optional[ProblemStatement]:
         """
         Get a specific problem statement by ID.
@@ -7,5 +7,7 @@ set -e
 # We run this in the background to allow the main application to start faster
 python scripts/ingest_data.py &
 
-# Start the uvicorn server
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# Start the uvicorn server on uvloop with the httptools parser (both ship
+# with uvicorn[standard]; naming them fails fast instead of silently
+# falling back to the asyncio loop and h11)
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools
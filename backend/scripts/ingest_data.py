@@ -4,12 +4,19 @@ Data ingestion script for SIH problem statements.
 Downloads problem statements from HuggingFace Hub and stores them in ChromaDB.
 """
 
+import hashlib
 import os
+import re
 import sys
-import json
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from dataclasses import dataclass, field
+from functools import cached_property
 from datetime import datetime
 
 # Add backend to Python path
@@ -18,8 +25,8 @@ sys.path.append(str(backend_path))
 
 import httpx
 import chromadb
+import numpy as np
 from sentence_transformers import SentenceTransformer
-from pydantic import BaseModel, ValidationError
 
 # Configure logging
 logging.basicConfig(
@@ -28,22 +35,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Texts per encoder forward pass. encode() sorts its inputs by length before
+# batching, so each batch is only padded to similar-length texts.
+EMBEDDING_BATCH_SIZE = 64
+GPU_EMBEDDING_BATCH_SIZE = 256
+# Decimal places kept per embedding component when sent to ChromaDB
+EMBEDDING_DECIMALS = 6
 
-class ProblemStatement(BaseModel):
-    """Pydantic model for problem statement validation."""
+# Validated problems embedded and stored together while the dataset streams
+INGEST_BATCH_SIZE = 256
+# Validated batches queued for the embedder
+PIPELINE_DEPTH = 4
+
+# Problems per ChromaDB add request, and add requests in flight at once
+STORE_BATCH_SIZE = 500
+STORE_CONCURRENCY = 4
+
+# Embedding backend: "onnx" runs the encoder on ONNX Runtime, "torch" on
+# PyTorch, and "auto" uses PyTorch in FP16 on a CUDA GPU if there is one,
+# else ONNX Runtime whenever the model can be exported
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto").lower()
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", str(Path(__file__).parent / "models")))
+# Saved SentenceTransformer models, loaded from disk instead of the hub
+SBERT_MODEL_DIR = Path(os.getenv("SBERT_MODEL_DIR", str(Path(__file__).parent / "models")))
+# Sequence lengths ONNX encoder batches are padded up to
+SEQUENCE_BUCKETS = (64, 128, 256)
+# Run the ONNX encoder with int8 weights (VNNI/AVX2 integer kernels on CPU)
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() in ("1", "true", "yes")
+
+
+# Common technology keywords to look for in problem descriptions, paired with
+# the capitalized form they are reported in
+TECH_KEYWORD_TITLES = tuple((tech, tech.title()) for tech in (
+    # Programming Languages
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
+    # Web Technologies
+    'react', 'angular', 'vue', 'nodejs', 'express', 'django', 'flask', 'spring', 'laravel',
+    # Mobile
+    'android', 'ios', 'flutter', 'react native', 'kotlin', 'swift',
+    # Databases
+    'mysql', 'postgresql', 'mongodb', 'redis', 'sqlite', 'oracle', 'cassandra',
+    # Cloud & DevOps
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'terraform',
+    # AI/ML
+    'tensorflow', 'pytorch', 'scikit-learn', 'opencv', 'nlp', 'machine learning', 'deep learning',
+    # Other
+    'blockchain', 'iot', 'api', 'rest', 'graphql', 'microservices', 'websocket'
+))
+# Words of lowercased text; dots only inside a word, so "node.js" is one
+# word but a sentence-final "python." is "python"
+TECH_TOKEN_RE = re.compile(r"[a-z+#]+(?:\.[a-z+#]+)*")
+# Single-word keywords are matched against the set of words in a text;
+# phrases (and hyphenated names) by substring search
+TECH_WORD_TITLES = {tech: title for tech, title in TECH_KEYWORD_TITLES if TECH_TOKEN_RE.fullmatch(tech)}
+TECH_PHRASE_TITLES = tuple((tech, title) for tech, title in TECH_KEYWORD_TITLES if tech not in TECH_WORD_TITLES)
+
+
+# Description keywords indicating hard and easy problems
+HARD_KEYWORDS = (
+    'machine learning', 'deep learning', 'ai', 'blockchain', 'microservices',
+    'distributed', 'scalable', 'real-time', 'big data', 'cloud', 'kubernetes'
+)
+EASY_KEYWORDS = (
+    'simple', 'basic', 'crud', 'static', 'prototype', 'demo'
+)
+
+
+@dataclass(slots=True)
+class ProblemStatement:
+    """A cleaned problem statement, as built by validate_problem_statement."""
     id: str
     title: str
     organization: str
     category: str
     description: str
-    technology_stack: List[str] = []
+    created_at: str
+    technology_stack: List[str] = field(default_factory=list)
     difficulty_level: str = "Medium"
-    created_at: Optional[str] = None
-
-    def model_post_init(self, __context: Any) -> None:
-        """Set created_at if not provided."""
-        if not self.created_at:
-            self.created_at = datetime.now().isoformat()
+    # Text both embedded and stored as the ChromaDB document
+    doc_text: str = ""
 
 
 class DataIngestionError(Exception):
@@ -51,6 +121,111 @@ class DataIngestionError(Exception):
     pass
 
 
+def export_minilm_to_onnx(model: SentenceTransformer, onnx_path: Path) -> None:
+    """Export the transformer of a SentenceTransformer model to ONNX (needs the onnx package)."""
+    import torch
+    
+    transformer = model[0].auto_model.eval()
+    sample = model.tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    
+    onnx_path.parent.mkdir(parents=True, exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    logger.info(f"Exported {onnx_path.name} to {onnx_path.parent}")
+
+
+def quantize_onnx_model(onnx_path: Path, quantized_path: Path) -> None:
+    """Write an int8 dynamically quantized copy of an ONNX model."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    quantize_dynamic(str(onnx_path), str(quantized_path), weight_type=QuantType.QInt8)
+    logger.info(f"Quantized {onnx_path.name} to {quantized_path.name}")
+
+
+class OnnxSentenceEncoder:
+    """
+    SentenceTransformer stand-in that runs the encoder on ONNX Runtime.
+    
+    Reproduces the all-MiniLM-L6-v2 pipeline (transformer, attention-masked
+    mean pooling, optional L2 normalization) behind the same ``encode`` call.
+    """
+    
+    def __init__(self, onnx_path: Path, tokenizer: Any, max_seq_length: int):
+        import onnxruntime as ort
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = os.cpu_count() or 1
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.sequence_buckets = sorted(
+            {bucket for bucket in SEQUENCE_BUCKETS if bucket < max_seq_length} | {max_seq_length}
+        )
+    
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """Embed ``texts``, batching similar lengths together like SentenceTransformer.encode."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        # Tokenize all texts in one call, then sort and pad by token count
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_seq_length)
+        lengths = [len(input_ids) for input_ids in encoded["input_ids"]]
+        order = np.argsort([-length for length in lengths], kind="stable")
+        pad_token_id = self.tokenizer.pad_token_id or 0
+        embeddings: Optional[np.ndarray] = None
+        
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            # Pad to a bucket length so the session only ever sees a few
+            # input shapes, whose kernels and buffers ORT then reuses
+            longest = max(lengths[i] for i in batch_idx)
+            seq_len = next(bucket for bucket in self.sequence_buckets if bucket >= longest)
+            
+            inputs: Dict[str, np.ndarray] = {}
+            for name, rows in encoded.items():
+                padded = np.full(
+                    (len(batch_idx), seq_len),
+                    pad_token_id if name == "input_ids" else 0,
+                    dtype=np.int64
+                )
+                for row, i in enumerate(batch_idx):
+                    padded[row, :lengths[i]] = rows[i]
+                inputs[name] = padded
+            feeds = {name: value for name, value in inputs.items() if name in self.input_names}
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            
+            # Mean over real tokens only
+            mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[batch_idx] = pooled
+        
+        return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+
 class SIHDataIngester:
     """Handles downloading and ingesting SIH problem statements."""
     
@@ -60,17 +235,81 @@ class SIHDataIngester:
         self.chroma_port = chroma_port
         self.model_name = "all-MiniLM-L6-v2"
         self.collection_name = "problem_statements"
+        self.embedding_batch_size = EMBEDDING_BATCH_SIZE
         
-        # Initialize sentence transformer
-        logger.info(f"Loading sentence transformer model: {self.model_name}")
-        self.sentence_model = SentenceTransformer(self.model_name)
-        
-        # Initialize ChromaDB client
+        # ChromaDB client, connected by connect_to_chromadb
         self.chroma_client = None
         self.collection = None
+    
+    @cached_property
+    def sentence_model(self) -> Any:
+        """Sentence encoder, loaded on first use rather than at construction."""
+        logger.info(f"Loading sentence transformer model: {self.model_name}")
+        return self._load_sentence_model()
+    
+    def _load_sentence_transformer(self, **kwargs: Any) -> SentenceTransformer:
+        """
+        Load the model from its saved copy under SBERT_MODEL_DIR, which needs
+        no hub requests; download and save it there on first use.
+        """
+        model_dir = SBERT_MODEL_DIR / self.model_name
+        if (model_dir / "modules.json").exists():
+            return SentenceTransformer(str(model_dir), **kwargs)
+        
+        logger.info(f"Downloading {self.model_name} to {model_dir}")
+        model = SentenceTransformer(self.model_name, **kwargs)
+        try:
+            model.save(str(model_dir))
+        except OSError as e:
+            logger.warning(f"Could not save {self.model_name} to {model_dir}: {e}")
+        return model
+    
+    def _load_sentence_model(self) -> Any:
+        """Load the encoder on the fastest device the backend allows."""
+        import torch
         
+        if EMBEDDING_BACKEND != "onnx" and torch.cuda.is_available():
+            model = self._load_sentence_transformer(device="cuda")
+            model.half()
+            self.embedding_batch_size = GPU_EMBEDDING_BATCH_SIZE
+            logger.info(f"Running {self.model_name} on CUDA in FP16")
+            return model
+        
+        model = self._load_sentence_transformer()
+        if EMBEDDING_BACKEND == "torch":
+            return model
+        
+        onnx_path = ONNX_MODEL_DIR / f"{self.model_name}.onnx"
+        try:
+            if not onnx_path.exists():
+                export_minilm_to_onnx(model, onnx_path)
+            if ONNX_QUANTIZE:
+                onnx_path = self._quantized_model_path(onnx_path)
+            encoder = OnnxSentenceEncoder(onnx_path, model.tokenizer, model.max_seq_length)
+            logger.info(f"Running {self.model_name} on ONNX Runtime ({onnx_path.name})")
+            return encoder
+        except Exception as e:
+            if EMBEDDING_BACKEND == "onnx":
+                raise DataIngestionError(f"ONNX Runtime encoder unavailable: {str(e)}")
+            logger.info(f"ONNX Runtime encoder unavailable ({str(e)}), using PyTorch")
+            return model
+    
+    def _quantized_model_path(self, onnx_path: Path) -> Path:
+        """Return the int8 copy of ``onnx_path``, creating it on first use; fall back to FP32."""
+        quantized_path = onnx_path.with_name(f"{onnx_path.stem}-int8.onnx")
+        try:
+            if not quantized_path.exists():
+                quantize_onnx_model(onnx_path, quantized_path)
+            return quantized_path
+        except Exception as e:
+            logger.info(f"Int8 quantization unavailable ({str(e)}), using the FP32 ONNX model")
+            return onnx_path
+    
     def connect_to_chromadb(self) -> None:
-        """Connect to ChromaDB and create/get collection."""
+        """Connect to ChromaDB and create/get collection; a no-op once connected."""
+        if self.collection is not None:
+            return
+        
         try:
             # Try HTTP client first, fallback to embedded client
             try:
@@ -97,31 +336,33 @@ class SIHDataIngester:
         except Exception as e:
             raise DataIngestionError(f"Failed to connect to ChromaDB: {str(e)}")
     
-    def download_from_huggingface(self, dataset_url: str) -> List[Dict[str, Any]]:
-        """Download problem statements from HuggingFace Hub."""
+    def download_from_huggingface(self, dataset_url: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream problem statements from HuggingFace Hub.
+        
+        Rows are yielded as they arrive instead of being collected into a
+        list first; download errors surface while iterating.
+        """
         try:
             logger.info(f"Downloading data from HuggingFace: {dataset_url}")
             
             # For HuggingFace datasets, we need to use the datasets library
             try:
                 from datasets import load_dataset
+            except ImportError:
+                load_dataset = None
+            
+            if load_dataset is not None:
                 logger.info("Using HuggingFace datasets library to load SIH2024 dataset")
                 
-                # Load the dataset
+                # Downloaded once into the HF cache as Arrow files; later runs
+                # memory-map them, and rows are still read one at a time
                 dataset = load_dataset("prof-freakenstein/SIH2024")
                 
-                # Convert to list of dictionaries
-                data = []
                 for split_name in dataset.keys():
                     logger.info(f"Processing split: {split_name}")
-                    split_data = dataset[split_name]
-                    for item in split_data:
-                        data.append(dict(item))
-                
-                logger.info(f"Downloaded {len(data)} problem statements from HuggingFace dataset")
-                return data
-                
-            except ImportError:
+                    yield from dataset[split_name]
+            else:
                 logger.warning("HuggingFace datasets library not available, trying direct HTTP download")
                 # Fallback to direct HTTP download
                 with httpx.Client(timeout=30.0) as client:
@@ -131,17 +372,33 @@ class SIHDataIngester:
                     # Parse JSON data
                     data = response.json()
                     logger.info(f"Downloaded {len(data)} problem statements via HTTP")
-                    return data
+                    yield from data
                 
         except Exception as e:
             logger.error(f"Failed to download from HuggingFace: {str(e)}")
             raise DataIngestionError(f"HuggingFace download failed: {str(e)}")
     
-    def validate_problem_statement(self, data: Dict[str, Any]) -> Optional[ProblemStatement]:
-        """Validate and clean a single problem statement."""
+    def validate_problem_statement(self, data: Dict[str, Any], ts: Optional[str] = None) -> Optional[ProblemStatement]:
+        """
+        Validate and clean a single problem statement.
+        
+        ts is the created_at timestamp; callers validating many rows pass
+        one shared value instead of formatting the current time per row.
+        """
         try:
             # Handle the actual SIH2024 dataset format
-            problem_id = data.get("id", f"sih2024_{hash(str(data)) % 100000}")
+            problem_id = data.get("id")
+            if problem_id is None:
+                # Content-addressed over every field that is stored, so stable
+                # across runs and processes and distinct for rows that differ
+                digest = hashlib.blake2b(
+                    "\x1f".join(
+                        str(data.get(key, ""))
+                        for key in ("title", "text", "category", "subcategory", "organization")
+                    ).encode(),
+                    digest_size=8
+                ).hexdigest()
+                problem_id = f"sih2024_{digest}"
             title = data.get("title", "").strip()
             category = data.get("category", "General").strip()
             subcategory = data.get("subcategory", "").strip()
@@ -155,10 +412,12 @@ class SIHDataIngester:
                 full_category = category
             
             # Extract technology stack from description text
-            tech_stack = self._extract_tech_stack_from_text(description)
+            # Both keyword scans below work on the same lowercased text
+            description_lower = description.lower()
+            tech_stack = self._extract_tech_stack_from_text(description_lower)
             
             # Determine difficulty level based on description complexity and keywords
-            difficulty = self._determine_difficulty_level(description, tech_stack)
+            difficulty = self._determine_difficulty_level(description_lower, tech_stack)
             
             # Ensure required fields exist with defaults
             cleaned_data = {
@@ -168,7 +427,8 @@ class SIHDataIngester:
                 "category": str(full_category).strip(),
                 "description": str(description).strip(),
                 "technology_stack": tech_stack,
-                "difficulty_level": str(difficulty).strip()
+                "difficulty_level": str(difficulty).strip(),
+                "created_at": ts or datetime.now().isoformat()
             }
             
             # Validate required fields are not empty
@@ -176,74 +436,45 @@ class SIHDataIngester:
                 logger.warning(f"Skipping problem with missing title or description: {cleaned_data['id']}")
                 return None
             
+            tech_stack_text = " ".join(tech_stack)
+            cleaned_data["doc_text"] = (
+                f"{cleaned_data['title']}\n{cleaned_data['description']}\nTech Stack: {tech_stack_text}"
+            )
+            
             return ProblemStatement(**cleaned_data)
             
-        except ValidationError as e:
-            logger.warning(f"Validation error for problem statement: {str(e)}")
-            return None
         except Exception as e:
             logger.warning(f"Unexpected error validating problem statement: {str(e)}")
             return None
     
-    def _extract_tech_stack_from_text(self, text: str) -> List[str]:
-        """Extract technology stack from problem description text."""
-        if not text:
+    def _extract_tech_stack_from_text(self, text_lower: str) -> List[str]:
+        """Extract technology stack from lowercased problem description text."""
+        if not text_lower:
             return []
         
-        # Common technology keywords to look for
-        tech_keywords = {
-            # Programming Languages
-            'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-            # Web Technologies
-            'react', 'angular', 'vue', 'nodejs', 'express', 'django', 'flask', 'spring', 'laravel',
-            # Mobile
-            'android', 'ios', 'flutter', 'react native', 'kotlin', 'swift',
-            # Databases
-            'mysql', 'postgresql', 'mongodb', 'redis', 'sqlite', 'oracle', 'cassandra',
-            # Cloud & DevOps
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'terraform',
-            # AI/ML
-            'tensorflow', 'pytorch', 'scikit-learn', 'opencv', 'nlp', 'machine learning', 'deep learning',
-            # Other
-            'blockchain', 'iot', 'api', 'rest', 'graphql', 'microservices', 'websocket'
-        }
-        
-        text_lower = text.lower()
-        found_tech = []
-        
-        for tech in tech_keywords:
-            if tech in text_lower:
-                # Capitalize first letter for consistency
-                found_tech.append(tech.title())
-        
-        # Remove duplicates and return
-        return list(set(found_tech))
+        # Whole-word lookups, so "go" is not found in "google" nor "api" in
+        # "rapid"; only the few multi-word keywords need a substring scan
+        words = set(TECH_TOKEN_RE.findall(text_lower))
+        found = {TECH_WORD_TITLES[tech] for tech in words.intersection(TECH_WORD_TITLES)}
+        found.update(title for tech, title in TECH_PHRASE_TITLES if tech in text_lower)
+        return list(found)
     
-    def _determine_difficulty_level(self, description: str, tech_stack: List[str]) -> str:
-        """Determine difficulty level based on description and tech stack."""
-        if not description:
+    def _determine_difficulty_level(self, text_lower: str, tech_stack: List[str]) -> str:
+        """Determine difficulty level based on lowercased description text and tech stack."""
+        if not text_lower:
             return "Medium"
         
-        description_lower = description.lower()
-        
-        # Hard indicators
-        hard_keywords = [
-            'machine learning', 'deep learning', 'ai', 'blockchain', 'microservices',
-            'distributed', 'scalable', 'real-time', 'big data', 'cloud', 'kubernetes'
-        ]
-        
-        # Easy indicators
-        easy_keywords = [
-            'simple', 'basic', 'crud', 'static', 'prototype', 'demo'
-        ]
-        
-        hard_score = sum(1 for keyword in hard_keywords if keyword in description_lower)
-        easy_score = sum(1 for keyword in easy_keywords if keyword in description_lower)
         tech_complexity = len(tech_stack)
+        if tech_complexity >= 5:
+            return "Hard"
         
-        if hard_score >= 2 or tech_complexity >= 5:
+        # Keyword checks are C-level substring searches; the easy list is
+        # only scanned when the tech stack does not already decide it
+        hard_score = sum(1 for keyword in HARD_KEYWORDS if keyword in text_lower)
+        
+        if hard_score >= 2:
             return "Hard"
-        elif easy_score >= 1 or tech_complexity <= 2:
+        elif tech_complexity <= 2 or any(keyword in text_lower for keyword in EASY_KEYWORDS):
             return "Easy"
         else:
             return "Medium"
@@ -252,23 +483,43 @@ class SIHDataIngester:
         """Generate vector embeddings for problem statements."""
         logger.info("Generating vector embeddings...")
         
-        # Create text for embedding (title + description + tech stack)
-        texts = []
-        for problem in problems:
-            tech_stack_text = " ".join(problem.technology_stack)
-            combined_text = f"{problem.title} {problem.description} {tech_stack_text}"
-            texts.append(combined_text)
+        # Embed the same title/description/tech stack text that is stored
+        texts = [problem.doc_text for problem in problems]
+        # Loading the model (on first use) may raise embedding_batch_size
+        sentence_model = self.sentence_model
         
-        # Generate embeddings
-        embeddings = self.sentence_model.encode(texts, show_progress_bar=True)
+        # Generate embeddings; unit-length vectors leave nothing for cosine
+        # distance to normalize
+        embeddings = sentence_model.encode(
+            texts,
+            batch_size=self.embedding_batch_size,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
         logger.info(f"Generated {len(embeddings)} embeddings")
         
-        return embeddings.tolist()
+        # ChromaDB's HTTP API takes JSON lists of floats, and float32 values
+        # print with ~18 digits as Python floats. Rounding the unit-length
+        # vectors to EMBEDDING_DECIMALS halves the request size for an error
+        # far below float16 precision.
+        return np.round(embeddings.astype(np.float64), EMBEDDING_DECIMALS).tolist()
     
     def store_in_chromadb(self, problems: List[ProblemStatement], embeddings: List[List[float]]) -> None:
         """Store problem statements and embeddings in ChromaDB."""
         logger.info("Storing data in ChromaDB...")
         
+        # collection.add rejects a whole request containing a repeated id
+        # (DuplicateIDError) and skips ids already in the collection, so keep
+        # the first occurrence here too for the same first-wins result
+        first_index: Dict[str, int] = {}
+        for i, problem in enumerate(problems):
+            first_index.setdefault(problem.id, i)
+        if len(first_index) < len(problems):
+            logger.warning(f"Skipping {len(problems) - len(first_index)} problems with duplicate ids")
+            problems = [problems[i] for i in first_index.values()]
+            embeddings = [embeddings[i] for i in first_index.values()]
+        
         # Prepare data for ChromaDB
         ids = [problem.id for problem in problems]
         metadatas = []
@@ -280,25 +531,30 @@ class SIHDataIngester:
                 "title": problem.title,
                 "organization": problem.organization,
                 "category": problem.category,
-                "technology_stack": json.dumps(problem.technology_stack),
+                "technology_stack": ", ".join(problem.technology_stack),
                 "difficulty_level": problem.difficulty_level,
                 "created_at": problem.created_at
             }
             metadatas.append(metadata)
-            
-            # Create document text for ChromaDB
-            tech_stack_text = " ".join(problem.technology_stack)
-            document = f"{problem.title}\n{problem.description}\nTech Stack: {tech_stack_text}"
-            documents.append(document)
+            documents.append(problem.doc_text)
         
-        try:
-            # Store in ChromaDB
+        def add_batch(start: int) -> None:
+            end = start + STORE_BATCH_SIZE
+            started = time.perf_counter()
             self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                documents=documents
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                documents=documents[start:end]
             )
+            logger.info(f"Stored problems {start}-{min(end, len(ids))} in {time.perf_counter() - started:.2f}s")
+        
+        try:
+            # Store in ChromaDB in bounded batches rather than one multi-MB
+            # request; the client's pooled connections serve the worker threads
+            with ThreadPoolExecutor(max_workers=STORE_CONCURRENCY) as executor:
+                for future in [executor.submit(add_batch, start) for start in range(0, len(ids), STORE_BATCH_SIZE)]:
+                    future.result()
             logger.info(f"Successfully stored {len(problems)} problem statements in ChromaDB")
             
         except Exception as e:
@@ -336,35 +592,76 @@ class SIHDataIngester:
             # Connect to ChromaDB
             self.connect_to_chromadb()
             
-            # Download data
-            raw_data = self.download_from_huggingface(dataset_url)
-            
-            # Validate and clean data
-            logger.info("Validating problem statements...")
-            valid_problems = []
-            for item in raw_data:
-                problem = self.validate_problem_statement(item)
-                if problem:
-                    valid_problems.append(problem)
-            
-            if not valid_problems:
+            # Download, validate, embed and store in batches as rows stream
+            # in, as a three-stage pipeline: a producer thread validates rows
+            # into batches, this thread embeds them, and a store thread writes
+            # them to ChromaDB. The encoder and the HTTP writes release the
+            # GIL, so validation, embedding and storage overlap, and at most
+            # PIPELINE_DEPTH + 2 batches are held in memory.
+            logger.info("Validating and ingesting problem statements...")
+            ingest_ts = datetime.now().isoformat()
+            total_downloaded = 0
+            total_valid = 0
+            batches: "queue.Queue[Optional[List[ProblemStatement]]]" = queue.Queue(maxsize=PIPELINE_DEPTH)
+            stop = threading.Event()
+            pending_store: Optional[Future] = None
+            
+            def validate_batches() -> None:
+                nonlocal total_downloaded
+                batch: List[ProblemStatement] = []
+                try:
+                    for item in self.download_from_huggingface(dataset_url):
+                        if stop.is_set():
+                            return
+                        total_downloaded += 1
+                        problem = self.validate_problem_statement(item, ts=ingest_ts)
+                        if problem:
+                            batch.append(problem)
+                        if len(batch) >= INGEST_BATCH_SIZE:
+                            batches.put(batch)
+                            batch = []
+                    
+                    if batch:
+                        batches.put(batch)
+                finally:
+                    # End of input (or a download error, raised from the future)
+                    batches.put(None)
+            
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                producer = executor.submit(validate_batches)
+                try:
+                    while (problems := batches.get()) is not None:
+                        embeddings = self.generate_embeddings(problems)
+                        # At most one batch waits to be stored
+                        if pending_store is not None:
+                            pending_store.result()
+                        pending_store = executor.submit(self.store_in_chromadb, problems, embeddings)
+                        total_valid += len(problems)
+                    
+                    if pending_store is not None:
+                        pending_store.result()
+                    producer.result()
+                finally:
+                    # On failure, unblock the producer and let it wind down
+                    stop.set()
+                    while not producer.done():
+                        try:
+                            batches.get(timeout=0.1)
+                        except queue.Empty:
+                            pass
+            
+            if not total_valid:
                 raise DataIngestionError("No valid problem statements found after validation")
             
-            logger.info(f"Validated {len(valid_problems)} out of {len(raw_data)} problem statements")
-            
-            # Generate embeddings
-            embeddings = self.generate_embeddings(valid_problems)
-            
-            # Store in ChromaDB
-            self.store_in_chromadb(valid_problems, embeddings)
+            logger.info(f"Validated {total_valid} out of {total_downloaded} problem statements")
             
             # Verify ingestion
             verification = self.verify_ingestion()
             
             return {
                 "status": "success",
-                "total_downloaded": len(raw_data),
-                "total_valid": len(valid_problems),
+                "total_downloaded": total_downloaded,
+                "total_valid": total_valid,
                 "total_stored": verification.get("total_documents", 0),
                 "verification": verification
             }
@@ -406,8 +703,7 @@ def test_search_functionality(ingester: SIHDataIngester) -> None:
                     print(f"{i+1}. {metadata['title']} (Distance: {distance:.3f})")
                     print(f"   Organization: {metadata['organization']}")
                     print(f"   Category: {metadata['category']}")
-                    tech_stack = json.loads(metadata['technology_stack'])
-                    print(f"   Tech Stack: {', '.join(tech_stack)}")
+                    print(f"   Tech Stack: {metadata['technology_stack']}")
                     print()
             else:
                 print("No results found")
@@ -495,9 +791,10 @@ def main():
             ingester.connect_to_chromadb()
             
             # Validate sample data
+            ingest_ts = datetime.now().isoformat()
             valid_problems = []
             for item in sample_data:
-                problem = ingester.validate_problem_statement(item)
+                problem = ingester.validate_problem_statement(item, ts=ingest_ts)
                 if problem:
                     valid_problems.append(problem)
             
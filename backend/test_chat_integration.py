@@ -1,98 +1,102 @@
 """
 Integration test script for chat functionality.
-This script tests the chat endpoints with mock data.
+This script tests the chat service and endpoints against a mocked OpenRouter API.
+
+Run it directly or with pytest; the mocked OpenRouter client, settings and
+chat service are built once per module and shared by every test.
 """
 import os
 import sys
-import asyncio
-from unittest.mock import patch, Mock
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
 
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 
-from app.services.chat_service import ChatService, get_chat_service
-from app.models import ChatRequest
-
-
-async def test_chat_service_integration():
-    """Test the chat service with mocked Gemini API."""
-    print("Testing Chat Service Integration...")
-    
-    # Mock the Gemini API
-    with patch('app.services.chat_service.genai') as mock_genai:
-        # Mock the settings to have a valid API key
-        with patch('app.services.chat_service.settings') as mock_settings:
-            mock_settings.gemini_api_key = "test_api_key"
-            
-            # Create a mock model and response
-            mock_model = Mock()
-            mock_response = Mock()
-            mock_response.text = "Based on the problem statement, I recommend using Python with TensorFlow for machine learning, FastAPI for the backend, and React for the frontend. This tech stack would be suitable for developing a healthcare solution with ML capabilities."
-            
-            mock_model.generate_content.return_value = mock_response
-            mock_genai.GenerativeModel.return_value = mock_model
-            
-            # Create chat service
-            chat_service = ChatService()
-            
-            # Test data
-            problem_context = """
-            Develop a machine learning solution for healthcare technology 
-            implementation that can solve problems in rural areas using 
-            advanced algorithms and modern technology stack to implement
-            innovative solutions for better healthcare delivery and improve
-            patient outcomes through data-driven approaches.
-            """
-            
-            user_question = "What would be a good tech stack for this problem?"
-            
-            # Test context validation
-            print("✓ Testing context validation...")
-            assert chat_service._validate_context(problem_context) == True
-            assert chat_service._validate_context("short") == False
-            
-            # Test response generation
-            print("✓ Testing response generation...")
-            response = await chat_service.generate_response(problem_context, user_question)
-            assert response is not None
-            assert len(response) > 0
-            print(f"Response: {response[:100]}...")
-            
-            # Test suggested questions
-            print("✓ Testing suggested questions...")
-            suggestions = chat_service.get_suggested_questions()
-            assert isinstance(suggestions, list)
-            assert len(suggestions) > 0
-            print(f"Got {len(suggestions)} suggested questions")
-            
-            # Test streaming response
-            print("✓ Testing streaming response...")
-            chunks = []
-            mock_streaming_response = [
-                Mock(text="Based on the problem"),
-                Mock(text=" statement, I recommend"),
-                Mock(text=" using Python with TensorFlow")
-            ]
-            mock_model.generate_content.return_value = mock_streaming_response
-            
-            async for chunk in chat_service.generate_streaming_response(problem_context, user_question):
-                chunks.append(chunk)
-            
-            assert len(chunks) > 0
-            print(f"Got {len(chunks)} streaming chunks")
-            
-            print("✅ All chat service tests passed!")
-
-
-async def test_chat_router_integration():
+from app.services.chat_service import ChatService
+
+MOCK_RESPONSE_TEXT = "Based on the problem statement, I recommend using Python with TensorFlow for machine learning, FastAPI for the backend, and React for the frontend. This tech stack would be suitable for developing a healthcare solution with ML capabilities."
+MOCK_STREAM_CHUNKS = ["Based on the problem", " statement, I recommend", " using Python with TensorFlow"]
+
+PROBLEM_CONTEXT = """
+Develop a machine learning solution for healthcare technology
+implementation that can solve problems in rural areas using
+advanced algorithms and modern technology stack to implement
+innovative solutions for better healthcare delivery and improve
+patient outcomes through data-driven approaches.
+"""
+USER_QUESTION = "What would be a good tech stack for this problem?"
+
+
+def mock_openrouter(request: httpx.Request) -> httpx.Response:
+    """Answer OpenRouter completion requests, streamed or not."""
+    if json.loads(request.content).get("stream"):
+        events = "".join(
+            f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}\n\n"
+            for chunk in MOCK_STREAM_CHUNKS
+        )
+        return httpx.Response(200, content=(events + "data: [DONE]\n\n").encode())
+    return httpx.Response(200, json={"choices": [{"message": {"content": MOCK_RESPONSE_TEXT}}]})
+
+
+@pytest.fixture(scope="module", autouse=True)
+def mock_settings():
+    """Give the chat service a valid API key for the whole module."""
+    patcher = patch('app.services.chat_service.settings', openrouter_api_key="test_api_key", app_name="Test API")
+    settings = patcher.start()
+    try:
+        yield settings
+    finally:
+        patcher.stop()
+
+
+@pytest.fixture(scope="module")
+def chat_service(mock_settings):
+    """Chat service whose OpenRouter client is served by mock_openrouter."""
+    return ChatService(client=httpx.AsyncClient(transport=httpx.MockTransport(mock_openrouter)))
+
+
+def test_context_validation(chat_service):
+    """Test problem context validation."""
+    print("✓ Testing context validation...")
+    assert chat_service._validate_context(PROBLEM_CONTEXT) == True
+    assert chat_service._validate_context("short") == False
+
+
+async def test_response_generation(chat_service):
+    """Test non-streaming response generation."""
+    print("✓ Testing response generation...")
+    response = await chat_service.generate_response(PROBLEM_CONTEXT, USER_QUESTION)
+    assert response == MOCK_RESPONSE_TEXT
+    print(f"Response: {response[:100]}...")
+
+
+def test_suggested_questions(chat_service):
+    """Test suggested questions."""
+    print("✓ Testing suggested questions...")
+    suggestions = chat_service.get_suggested_questions()
+    assert len(suggestions) > 0
+    print(f"Got {len(suggestions)} suggested questions")
+
+
+async def test_streaming_response(chat_service):
+    """Test streaming response generation."""
+    print("✓ Testing streaming response...")
+    chunks = [chunk async for chunk in chat_service.generate_streaming_response(PROBLEM_CONTEXT, USER_QUESTION)]
+    assert chunks == MOCK_STREAM_CHUNKS
+    print(f"Got {len(chunks)} streaming chunks")
+
+
+def test_chat_router_integration(chat_service):
     """Test the chat router endpoints."""
-    print("\nTesting Chat Router Integration...")
-    
     from fastapi.testclient import TestClient
     from app.main import app
-    
+
     client = TestClient(app)
-    
+
     # Test health endpoint
     print("✓ Testing health endpoint...")
     response = client.get("/api/chat/health")
@@ -100,38 +104,20 @@ async def test_chat_router_integration():
     data = response.json()
     assert data["status"] == "healthy"
     print("Health check passed")
-    
+
     # Test suggestions endpoint
     print("✓ Testing suggestions endpoint...")
-    with patch('app.routers.chat.get_chat_service') as mock_get_service:
-        mock_service = Mock()
-        mock_service.get_suggested_questions.return_value = [
-            "What is the core problem?",
-            "What tech stack would you recommend?"
-        ]
-        mock_get_service.return_value = mock_service
-        
+    with patch('app.routers.chat.get_chat_service', return_value=chat_service):
         response = client.get("/api/chat/suggestions")
         assert response.status_code == 200
         data = response.json()
         assert "suggestions" in data
         assert len(data["suggestions"]) > 0
         print(f"Got {len(data['suggestions'])} suggestions")
-    
-    print("✅ All chat router tests passed!")
 
 
 if __name__ == "__main__":
     print("Starting Chat Functionality Integration Tests...\n")
-    
+
     # Run the tests
-    asyncio.run(test_chat_service_integration())
-    asyncio.run(test_chat_router_integration())
-    
-    print("\n🎉 All integration tests completed successfully!")
-    print("\nChat functionality is ready for use!")
-    print("\nAvailable endpoints:")
-    print("- POST /api/chat/ - Interactive chat about problem statements")
-    print("- POST /api/chat/stream - Streaming chat responses")
-    print("- GET /api/chat/suggestions - Get suggested questions")
-    print("- GET /api/chat/health - Health check")
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,60 @@
+"""
+Unit tests for the in-process TTL cache.
+"""
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test cases for TTLCache."""
+    
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Controllable replacement for time.monotonic."""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        return now
+    
+    def test_evicts_least_recently_used(self, clock):
+        """Inserting past maxsize drops the least recently used entry."""
+        cache = TTLCache(ttl_seconds=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        # Touch "a" so "b" becomes the eviction candidate
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+    
+    def test_entries_expire_after_ttl(self, clock):
+        """Entries are served until their TTL passes, then dropped on access."""
+        cache = TTLCache(ttl_seconds=60, maxsize=10)
+        cache.set("a", 1)
+        
+        clock[0] += 59
+        assert cache.get("a") == 1
+        
+        clock[0] += 1
+        assert cache.get("a", "missing") == "missing"
+        assert len(cache) == 0
+    
+    @pytest.mark.asyncio
+    async def test_get_or_load_reloads_expired_entries(self, clock):
+        """An expired entry is loaded again rather than served stale."""
+        cache = TTLCache(ttl_seconds=60, maxsize=10)
+        values = iter([1, 2])
+        
+        async def loader():
+            return next(values)
+        
+        assert await cache.get_or_load("a", loader) == 1
+        assert await cache.get_or_load("a", loader) == 1
+        
+        clock[0] += 60
+        assert await cache.get_or_load("a", loader) == 2
@@ -0,0 +1,56 @@
+"""
+Unit tests for the semantic chat response cache.
+"""
+import numpy as np
+import pytest
+
+from app.services import chat_cache as chat_cache_module
+from app.services.chat_cache import SemanticChatCache
+
+
+def unit(*values):
+    """Normalized float32 embedding, as SemanticChatCache.embed returns."""
+    vec = np.array(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+class TestSemanticChatCache:
+    """Test cases for SemanticChatCache."""
+    
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Controllable replacement for time.monotonic."""
+        now = [1000.0]
+        monkeypatch.setattr(chat_cache_module.time, "monotonic", lambda: now[0])
+        return now
+    
+    def test_paraphrase_served_from_cache(self, clock):
+        """A question close enough to a stored one gets its answer."""
+        cache = SemanticChatCache()
+        cache.store(unit(1.0, 0.0), "problem", "model", "answer")
+        
+        assert cache.lookup(unit(0.995, 0.0998), "problem", "model") == "answer"
+        assert cache.lookup(unit(0.0, 1.0), "problem", "model") is None
+        assert cache.lookup(unit(1.0, 0.0), "problem", "other-model") is None
+    
+    def test_entries_per_key_are_capped(self, clock):
+        """Storing past the per-key cap drops the oldest answers for that key."""
+        cache = SemanticChatCache(max_entries_per_key=3)
+        questions = [unit(np.cos(angle), np.sin(angle)) for angle in np.linspace(0, np.pi / 2, 5)]
+        for i, question in enumerate(questions):
+            cache.store(question, "problem", "model", f"answer {i}")
+        
+        entries = cache._entries[cache._key("problem", "model")]
+        assert [response for _, response, _ in entries] == ["answer 2", "answer 3", "answer 4"]
+        assert cache.lookup(questions[0], "problem", "model") is None
+        assert cache.lookup(questions[4], "problem", "model") == "answer 4"
+    
+    def test_store_prunes_expired_entries(self, clock):
+        """Expired answers are dropped when a new one is stored under the same key."""
+        cache = SemanticChatCache(ttl_seconds=60)
+        cache.store(unit(1.0, 0.0), "problem", "model", "old")
+        clock[0] += 61
+        cache.store(unit(0.0, 1.0), "problem", "model", "new")
+        
+        entries = cache._entries[cache._key("problem", "model")]
+        assert [response for _, response, _ in entries] == ["new"]
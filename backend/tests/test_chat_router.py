@@ -5,10 +5,13 @@ import json
 import pytest
 from unittest.mock import patch, Mock, AsyncMock
 from fastapi.testclient import TestClient
-from backend.app.main import app
+from app.main import app
 
 client = TestClient(app)
 
+# Long enough to pass the chat service's context validation
+VALID_CONTEXT = "x" * 60
+
 
 class TestChatRouter:
     """Test cases for chat router endpoints."""
@@ -16,7 +19,7 @@ class TestChatRouter:
     @pytest.fixture
     def mock_chat_service(self):
         """Mock the chat service for testing."""
-        with patch('backend.app.routers.chat.get_chat_service') as mock:
+        with patch('app.routers.chat.get_chat_service') as mock:
             service_mock = Mock()
             mock.return_value = service_mock
             yield service_mock
@@ -195,4 +198,63 @@ class TestChatRouter:
         
         assert response.status_code == 400  # Bad request due to validation error
         data = response.json()
-        assert "detail" in data
\ No newline at end of file
+        assert "detail" in data
+
+def test_chat_endpoints_unavailable_without_service():
+    """Chat endpoints answer 503 when the chat service cannot be configured."""
+    with patch('app.routers.chat.get_chat_service', side_effect=ValueError("no key")):
+        response = client.post("/api/chat/", json={
+            "problem_id": "p1",
+            "problem_context": VALID_CONTEXT,
+            "user_question": "Q?"
+        })
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Chat service is not configured"
+
+
+def test_chat_service_dependency_prefers_app_state():
+    """A service set up by lifespan is used instead of the lazy singleton."""
+    service = Mock()
+    service.generate_response = AsyncMock(return_value="from state")
+    app.state.chat_service = service
+    try:
+        with patch('app.routers.chat.get_chat_service') as lazy:
+            response = client.post("/api/chat/", json={
+                "problem_id": "p1",
+                "problem_context": VALID_CONTEXT,
+                "user_question": "Q?"
+            })
+        assert response.status_code == 200
+        assert response.json()["response"] == "from state"
+        lazy.assert_not_called()
+    finally:
+        app.state.chat_service = None
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_aborts_upstream_on_disconnect():
+    """A disconnected client stops the stream and closes the upstream generator."""
+    from app.models import ChatRequest
+    from app.routers.chat import chat_stream
+
+    closed = []
+
+    async def upstream():
+        try:
+            for chunk in ("one", "two", "three"):
+                yield chunk
+        finally:
+            closed.append(True)
+
+    service = Mock()
+    service._validate_context.return_value = True
+    service.generate_streaming_response.return_value = upstream()
+    request = Mock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+    chat_request = ChatRequest(problem_id="p1", problem_context=VALID_CONTEXT, user_question="Q?")
+
+    response = await chat_stream(chat_request, request, service)
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert chunks == ["one"]
+    assert closed == [True]
@@ -4,13 +4,36 @@ Tests for the chat service functionality using OpenRouter.
 import pytest
 import json
 import httpx
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import patch
 
 from app.services.chat_service import ChatService, ChatServiceError
 
 # Mark all tests in this file as asyncio
 pytestmark = pytest.mark.asyncio
 
+# Streaming does not validate the context; generate_response needs 50+ characters
+PROBLEM_CONTEXT = "A sample problem context."
+VALID_CONTEXT = "x" * 60
+
+class StreamResponse:
+    """
+    Just the parts of httpx.Response the streaming path uses; far cheaper to
+    build than AsyncMock(spec=httpx.Response).
+    """
+    def __init__(self, chunks=(), status_code=200):
+        self.chunks = chunks
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise httpx.HTTPStatusError(
+                "Server Error", request=httpx.Request("POST", "https://openrouter.ai"), response=self
+            )
+
+    async def aiter_bytes(self):
+        for chunk in self.chunks:
+            yield chunk
+
 # Custom mock for an async context manager
 class MockAsyncContextManager:
     def __init__(self, mock_response):
@@ -22,13 +45,19 @@ class MockAsyncContextManager:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         pass
 
-@pytest.fixture
-def mock_settings(mocker):
-    """Mock the settings with a valid OpenRouter API key."""
-    return mocker.patch(
+@pytest.fixture(scope="module", autouse=True)
+def mock_settings():
+    """Mock the settings with a valid OpenRouter API key, once for the whole module."""
+    patcher = patch(
         'app.services.chat_service.settings',
-        openrouter_api_key="test_api_key"
+        openrouter_api_key="test_api_key",
+        app_name="Test API"
     )
+    settings = patcher.start()
+    try:
+        yield settings
+    finally:
+        patcher.stop()
 
 @pytest.fixture
 def chat_service(mock_settings):
@@ -48,47 +77,253 @@ async def test_init_without_api_key(mocker):
 
 async def test_generate_streaming_response_success(mocker, chat_service):
     """Test successful streaming response generation from OpenRouter."""
-    problem_context = "A sample problem context."
     user_question = "A sample user question."
     expected_chunks = ["This", " is", " a", " test."]
 
-    async def mock_aiter_lines():
-        for chunk in expected_chunks:
-            data = {"choices": [{"delta": {"content": chunk}}]}
-            yield f"data: {json.dumps(data)}"
-        yield "data: [DONE]"
-
-    mock_response = AsyncMock(spec=httpx.Response)
-    mock_response.status_code = 200
-    mock_response.aiter_lines.return_value = mock_aiter_lines()
-    mock_response.raise_for_status = Mock() # Does nothing on success
+    mock_response = StreamResponse([
+        *(f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}\n\n".encode() for chunk in expected_chunks),
+        b"data: [DONE]\n\n",
+    ])
 
     # Use the custom mock context manager
     mock_cm_instance = MockAsyncContextManager(mock_response)
     mocker.patch("httpx.AsyncClient.stream", return_value=mock_cm_instance)
 
     # Act
-    chunks = []
-    async for chunk in chat_service.generate_streaming_response(problem_context, user_question):
-        chunks.append(chunk)
+    chunks = [chunk async for chunk in chat_service.generate_streaming_response(PROBLEM_CONTEXT, user_question)]
     
     # Assert
     assert chunks == expected_chunks
 
+async def test_generate_streaming_response_reassembles_split_lines(mocker, chat_service):
+    """SSE lines split across network chunks are parsed once complete."""
+    mock_response = StreamResponse([
+        b": OPENROUTER PROCESSING\n\ndata: {\"choices\": [{\"delta\": ",
+        b'{"content": "Hel"}}]}\ndata: {"choices": [{"delta": {"content": "lo"}}]}\n',
+        b"data: not-json\ndata: [DONE]\n",
+    ])
+    mocker.patch("httpx.AsyncClient.stream", return_value=MockAsyncContextManager(mock_response))
+
+    chunks = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Hi?")]
+
+    assert chunks == ["Hel", "lo"]
+
 async def test_generate_streaming_response_api_error(mocker, chat_service):
     """Test streaming response generation when the API call fails."""
-    problem_context = "A sample problem context."
     user_question = "A sample user question."
 
-    mock_response = AsyncMock(spec=httpx.Response)
-    mock_response.status_code = 500
-    mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-        "Server Error", request=Mock(), response=mock_response
-    )
+    mock_response = StreamResponse(status_code=500)
 
     # Use the custom mock context manager
     mock_cm_instance = MockAsyncContextManager(mock_response)
     mocker.patch("httpx.AsyncClient.stream", return_value=mock_cm_instance)
 
     with pytest.raises(ChatServiceError):
-        _ = [chunk async for chunk in chat_service.generate_streaming_response(problem_context, user_question)]
\ No newline at end of file
+        _ = [chunk async for chunk in chat_service.generate_streaming_response(PROBLEM_CONTEXT, user_question)]
+async def test_generate_streaming_response_served_from_semantic_cache(mocker, chat_service):
+    """A paraphrased question about the same problem is answered from the cache."""
+    import numpy as np
+
+    embeddings = {
+        "How hard is this?": np.array([1.0, 0.0], dtype=np.float32),
+        "How difficult is this?": np.array([0.995, 0.0998], dtype=np.float32),
+    }
+    mocker.patch.object(chat_service.response_cache, "embed", side_effect=embeddings.get)
+
+    mock_response = StreamResponse([
+        b'data: {"choices": [{"delta": {"content": "Fairly hard."}}]}\n\n',
+        b"data: [DONE]\n\n",
+    ])
+    stream = mocker.patch("httpx.AsyncClient.stream", return_value=MockAsyncContextManager(mock_response))
+
+    first = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "How hard is this?")]
+    second = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "How difficult is this?")]
+
+    assert "".join(first) == "".join(second) == "Fairly hard."
+    assert stream.call_count == 1
+
+async def test_streaming_calls_reuse_service_client(mocker, chat_service):
+    """Every OpenRouter call goes through the service's pooled client."""
+    mock_response = StreamResponse([b"data: [DONE]\n\n"])
+    stream = mocker.patch.object(
+        chat_service.client, "stream", return_value=MockAsyncContextManager(mock_response)
+    )
+
+    for question in ("First question?", "Second question?"):
+        _ = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, question)]
+
+    assert stream.call_count == 2
+    await chat_service.aclose()
+    assert chat_service.client.is_closed
+
+async def test_closing_stream_early_closes_upstream_response(mock_settings):
+    """Closing the service generator mid-stream exits the upstream httpx stream at once."""
+    closed = []
+
+    class OpenStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b'data: {"choices": [{"delta": {"content": "first"}}]}\n\n'
+            yield b'data: {"choices": [{"delta": {"content": "second"}}]}\n\n'
+
+        async def aclose(self):
+            closed.append(True)
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=OpenStream()))
+    chat_service = ChatService(client=httpx.AsyncClient(transport=transport))
+
+    stream = chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Q?")
+    assert await stream.__anext__() == "first"
+    await stream.aclose()
+
+    assert closed == [True]
+    await chat_service.aclose()
+
+async def test_validate_context(chat_service):
+    """Context must hold at least 50 non-surrounding-whitespace characters."""
+    assert chat_service._validate_context("x" * 50)
+    assert not chat_service._validate_context("")
+    assert not chat_service._validate_context("x" * 49)
+    assert not chat_service._validate_context("  " + "x" * 49 + "\n")
+    assert chat_service._validate_context("\n" + "x" * 50 + " ")
+
+async def test_parallel_race_relays_first_model_and_cancels_rest(mocker, mock_settings):
+    """With racing on, the first model to produce content wins and the others are cancelled."""
+    import asyncio
+
+    chat_service = ChatService(parallel_race=True)
+    cancelled = []
+
+    async def fake_stream(payload):
+        model = payload["models"][0]
+        if model == chat_service.default_models[1]:
+            yield "fast"
+            yield " answer"
+            return
+        try:
+            await asyncio.sleep(10)
+            yield "slow answer"
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+
+    mocker.patch.object(chat_service, "_call_openrouter_streaming_async", side_effect=fake_stream)
+
+    chunks = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Q?")]
+    await asyncio.sleep(0)
+
+    assert chunks == ["fast", " answer"]
+    assert sorted(cancelled) == sorted(
+        m for m in chat_service.default_models if m != chat_service.default_models[1]
+    )
+
+async def test_parallel_race_caches_answer_under_winning_model(mocker, mock_settings):
+    """A raced answer is cached for the model that produced it, not the first requested one."""
+    import numpy as np
+
+    chat_service = ChatService(parallel_race=True)
+    mocker.patch.object(chat_service.response_cache, "embed", return_value=np.array([1.0, 0.0], dtype=np.float32))
+    store = mocker.spy(chat_service.response_cache, "store")
+
+    async def fake_stream(payload):
+        if payload["models"][0] == chat_service.default_models[1]:
+            yield "fast answer"
+            return
+        raise httpx.ConnectError("down")
+        yield
+
+    mocker.patch.object(chat_service, "_call_openrouter_streaming_async", side_effect=fake_stream)
+
+    chunks = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Q?")]
+
+    assert chunks == ["fast answer"]
+    assert store.call_args.args[2] == chat_service.default_models[1]
+    assert chat_service.response_cache.lookup(
+        np.array([1.0, 0.0], dtype=np.float32), PROBLEM_CONTEXT, chat_service.default_models[0]
+    ) is None
+
+async def test_parallel_race_falls_through_failed_models(mocker, mock_settings):
+    """A model failing before producing content does not end the race."""
+    chat_service = ChatService(parallel_race=True)
+
+    async def fake_stream(payload):
+        if payload["models"][0] != chat_service.default_models[-1]:
+            raise httpx.ConnectError("down")
+        yield "survivor"
+
+    mocker.patch.object(chat_service, "_call_openrouter_streaming_async", side_effect=fake_stream)
+
+    chunks = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Q?")]
+
+    assert chunks == ["survivor"]
+
+    async def all_fail(payload):
+        raise httpx.ConnectError("down")
+        yield
+
+    mocker.patch.object(chat_service, "_call_openrouter_streaming_async", side_effect=all_fail)
+    with pytest.raises(ChatServiceError):
+        _ = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Q2?")]
+
+async def test_streaming_request_body_and_headers(mock_settings):
+    """The payload is sent pre-encoded with the prebuilt OpenRouter headers."""
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["headers"] = request.headers
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, content=b'data: {"choices": [{"delta": {"content": "ok"}}]}\n\ndata: [DONE]\n\n')
+
+    chat_service = ChatService(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    chunks = [c async for c in chat_service.generate_streaming_response(PROBLEM_CONTEXT, "Q?", model="m/1")]
+
+    assert chunks == ["ok"]
+    assert seen["headers"]["authorization"] == "Bearer test_api_key"
+    assert seen["headers"]["content-type"] == "application/json"
+    assert seen["body"]["models"] == ["m/1"]
+    assert seen["body"]["stream"] is True
+    assert seen["body"]["messages"][1] == {"role": "user", "content": "Question: Q?"}
+    await chat_service.aclose()
+
+async def test_generate_response_uses_single_non_streaming_call(mock_settings):
+    """generate_response posts once with stream disabled and returns the message content."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Full answer."}}]})
+
+    chat_service = ChatService(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    response = await chat_service.generate_response(VALID_CONTEXT, "Q?")
+
+    assert response == "Full answer."
+    assert len(requests) == 1
+    assert requests[0]["stream"] is False
+    assert requests[0]["models"] == list(chat_service.default_models)
+    await chat_service.aclose()
+
+async def test_generate_response_api_error(mock_settings):
+    """Upstream errors on the non-streaming path surface as ChatServiceError."""
+    transport = httpx.MockTransport(lambda request: httpx.Response(502))
+    chat_service = ChatService(client=httpx.AsyncClient(transport=transport))
+
+    with pytest.raises(ChatServiceError):
+        await chat_service.generate_response(VALID_CONTEXT, "Q?")
+    await chat_service.aclose()
+
+async def test_get_available_models_is_prebuilt(chat_service):
+    """The models response is built once and mirrors the model catalog."""
+    response = chat_service.get_available_models()
+
+    assert response is chat_service.get_available_models()
+    assert [m.id for m in response.models] == [m["id"] for m in chat_service.available_models]
+    assert response.default_model == chat_service.default_models[0]
+
+async def test_system_prompt_matches_template_and_is_reused(chat_service):
+    """The joined system prompt equals the formatted template and is built once per context."""
+    from app.services.chat_service import SYSTEM_PROMPT_TEMPLATE
+
+    context = "Build {a} tool for farmers " * 5
+    prompt = chat_service._system_prompt_for(context)
+
+    assert prompt == SYSTEM_PROMPT_TEMPLATE.replace("{problem_context}", context)
+    assert chat_service._system_prompt_for(context) is prompt
@@ -1,12 +1,13 @@
 """
 Unit tests for the dashboard service.
 """
+import asyncio
+import time
 import pytest
 import json
 from unittest.mock import Mock, AsyncMock, patch
-from datetime import datetime, timedelta
 
-from app.services.dashboard_service import DashboardService, DashboardServiceError
+from app.services.dashboard_service import CACHE_MAX_AGE_SECONDS, DashboardService, DashboardServiceError
 from app.models import DashboardStats
 
 
@@ -34,8 +35,25 @@ class TestDashboardService:
         return mock_client, mock_collection
     
     @pytest.fixture
-    def sample_problem_data(self):
-        """Create sample problem data for testing."""
+    def static_collection(self):
+        """Mock collection whose fingerprint never changes."""
+        collection = Mock()
+        collection.count.return_value = 4
+        collection.peek.return_value = {"ids": ["sih_001", "sih_002", "sih_003", "sih_004"]}
+        return collection
+    
+    @pytest.fixture
+    def sample_problem_data(self, sample_rows):
+        """Sample problem data in the column-oriented shape ChromaDB returns."""
+        return {
+            "ids": [row["id"] for row in sample_rows],
+            "metadatas": [row["metadata"] for row in sample_rows],
+            "documents": [row["document"] for row in sample_rows]
+        }
+    
+    @pytest.fixture
+    def sample_rows(self):
+        """Create sample problem rows for testing."""
         return [
             {
                 "id": "sih_001",
@@ -104,10 +122,15 @@ class TestDashboardService:
             with pytest.raises(DashboardServiceError, match="Dashboard service initialization failed"):
                 await dashboard_service.initialize()
     
-    def test_extract_keywords_from_text(self, dashboard_service):
-        """Test keyword extraction from text."""
+    def test_analyze_keywords_from_text(self, dashboard_service):
+        """Test keyword extraction from titles and descriptions."""
         text = "Develop an AI-powered traffic management system using machine learning algorithms"
-        keywords = dashboard_service._extract_keywords_from_text(text)
+        problem_data = {
+            "ids": ["sih_001"],
+            "metadatas": [{"title": text}],
+            "documents": [f"Title\n{text}\nTech Stack: "]
+        }
+        keywords = dict(dashboard_service._analyze_keywords(problem_data))
         
         # Should extract meaningful keywords and filter stop words
         # Note: "AI-powered" becomes "ai" and "powered" separately due to regex word boundaries
@@ -122,13 +145,16 @@ class TestDashboardService:
         assert "the" not in keywords  # Stop word should be filtered
         assert "using" not in keywords  # Stop word should be filtered
     
-    def test_extract_tech_keywords(self, dashboard_service):
-        """Test technology keyword extraction and normalization."""
-        tech_stack = ["Python", "React.js", "Node.js", "PostgreSQL", "TensorFlow"]
-        tech_keywords = dashboard_service._extract_tech_keywords(tech_stack)
+    def test_analyze_keywords_normalizes_tech_stack(self, dashboard_service):
+        """Test technology names are normalized and counted with double weight."""
+        problem_data = {
+            "ids": ["sih_001"],
+            "metadatas": [{"title": "", "technology_stack": "Python, React.js, Node.js, PostgreSQL, TensorFlow"}],
+            "documents": [None]
+        }
+        keywords = dashboard_service._analyze_keywords(problem_data)
         
-        expected = ["python", "react", "nodejs", "postgres", "tensorflow"]
-        assert tech_keywords == expected
+        assert sorted(keywords) == [("nodejs", 2), ("postgres", 2), ("python", 2), ("react", 2), ("tensorflow", 2)]
     
     def test_analyze_categories(self, dashboard_service, sample_problem_data):
         """Test category analysis."""
@@ -153,6 +179,35 @@ class TestDashboardService:
         }
         assert organizations == expected_organizations
     
+    def test_analyze_categories_and_organizations_skip_blanks(self, dashboard_service):
+        """Blank values are dropped and missing ones count as Unknown."""
+        problem_data = {
+            "ids": ["1", "2", "3"],
+            "metadatas": [
+                {"category": " Software ", "organization": "  "},
+                {"category": "", "organization": "Ministry A"},
+                {}
+            ],
+            "documents": ["", "", ""]
+        }
+        
+        assert dashboard_service._analyze_categories(problem_data) == {"Software": 1, "Unknown": 1}
+        assert dashboard_service._analyze_organizations(problem_data) == {"Ministry A": 1, "Unknown": 1}
+    
+    def test_analyze_keywords_comma_separated_tech_stack(self, dashboard_service, sample_problem_data):
+        """Test comma-separated and legacy JSON technology stacks are counted alike."""
+        comma_data = {
+            "ids": sample_problem_data["ids"],
+            "documents": sample_problem_data["documents"],
+            "metadatas": [
+                {**metadata, "technology_stack": ", ".join(json.loads(metadata["technology_stack"]))}
+                for metadata in sample_problem_data["metadatas"]
+            ]
+        }
+        
+        assert dashboard_service._analyze_keywords(comma_data, top_n=20) == \
+            dashboard_service._analyze_keywords(sample_problem_data, top_n=20)
+    
     def test_analyze_keywords(self, dashboard_service, sample_problem_data):
         """Test keyword analysis."""
         keywords = dashboard_service._analyze_keywords(sample_problem_data, top_n=10)
@@ -186,14 +241,10 @@ class TestDashboardService:
         mock_client, mock_collection = mock_chroma_client
         
         # Mock collection.count()
-        mock_collection.count.return_value = len(sample_problem_data)
+        mock_collection.count.return_value = len(sample_problem_data["ids"])
         
         # Mock collection.get() for batch fetching
-        mock_collection.get.return_value = {
-            "ids": [item["id"] for item in sample_problem_data],
-            "metadatas": [item["metadata"] for item in sample_problem_data],
-            "documents": [item["document"] for item in sample_problem_data]
-        }
+        mock_collection.get.return_value = sample_problem_data
         
         dashboard_service.chroma_client = mock_client
         dashboard_service.collection = mock_collection
@@ -201,18 +252,37 @@ class TestDashboardService:
         
         result = await dashboard_service._fetch_all_problem_data()
         
-        assert len(result) == 4
-        assert result[0]["id"] == "sih_001"
-        assert result[0]["metadata"]["title"] == "AI-Based Traffic Management System"
+        assert len(result["ids"]) == len(result["metadatas"]) == len(result["documents"]) == 4
+        assert result["ids"][0] == "sih_001"
+        assert result["metadatas"][0]["title"] == "AI-Based Traffic Management System"
     
     @pytest.mark.asyncio
-    async def test_get_dashboard_stats_with_cache(self, dashboard_service, sample_problem_data):
+    async def test_fetch_all_problem_data_multiple_batches(self, dashboard_service, mock_chroma_client):
+        """Batches are fetched concurrently and reassembled in offset order."""
+        mock_client, mock_collection = mock_chroma_client
+        mock_collection.count.return_value = 2500
+        
+        def get_batch(limit, offset, include):
+            ids = [f"sih_{i}" for i in range(offset, offset + limit)]
+            return {"ids": ids, "metadatas": [{"category": "Software"}] * limit, "documents": [""] * limit}
+        
+        mock_collection.get.side_effect = get_batch
+        dashboard_service.collection = mock_collection
+        
+        result = await dashboard_service._fetch_all_problem_data()
+        
+        assert mock_collection.get.call_count == 3
+        assert result["ids"] == [f"sih_{i}" for i in range(2500)]
+        assert len(result["metadatas"]) == len(result["documents"]) == 2500
+    
+    @pytest.mark.asyncio
+    async def test_get_dashboard_stats_with_cache(self, dashboard_service, sample_problem_data, static_collection):
         """Test getting dashboard stats with caching."""
         # Mock the fetch method
-        async def mock_fetch():
-            return sample_problem_data
+        mock_fetch = AsyncMock(return_value=sample_problem_data)
         
         dashboard_service._fetch_all_problem_data = mock_fetch
+        dashboard_service.collection = static_collection
         dashboard_service._initialized = True
         
         # First call should generate stats and cache them
@@ -225,15 +295,96 @@ class TestDashboardService:
         assert stats2 == stats1
         
         # Verify cache is being used
-        assert dashboard_service._is_cache_valid()
+        assert mock_fetch.await_count == 1
+        assert dashboard_service._is_cache_valid((4, ("sih_001", "sih_002", "sih_003", "sih_004")))
+    
+    @pytest.mark.asyncio
+    async def test_get_dashboard_stats_regenerates_when_collection_changes(
+        self, dashboard_service, sample_problem_data, static_collection
+    ):
+        """A changed count or id sample invalidates the cached stats."""
+        mock_fetch = AsyncMock(return_value=sample_problem_data)
+        
+        dashboard_service._fetch_all_problem_data = mock_fetch
+        dashboard_service.collection = static_collection
+        dashboard_service._initialized = True
+        
+        await dashboard_service.get_dashboard_stats()
+        static_collection.count.return_value = 5
+        await dashboard_service.get_dashboard_stats()
+        await dashboard_service.get_dashboard_stats()
+        
+        assert mock_fetch.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_dashboard_stats_regenerates_after_max_age(
+        self, dashboard_service, sample_problem_data, static_collection
+    ):
+        """Stats are regenerated once they outlive the maximum age, even for an unchanged fingerprint."""
+        mock_fetch = AsyncMock(return_value=sample_problem_data)
+        
+        dashboard_service._fetch_all_problem_data = mock_fetch
+        dashboard_service.collection = static_collection
+        dashboard_service._initialized = True
+        
+        await dashboard_service.get_dashboard_stats()
+        dashboard_service._cache_generated_at -= CACHE_MAX_AGE_SECONDS
+        await dashboard_service.get_dashboard_stats()
+        await dashboard_service.get_dashboard_stats()
+        
+        assert mock_fetch.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_dashboard_stats_coalesces_concurrent_misses(
+        self, dashboard_service, sample_problem_data, static_collection
+    ):
+        """Simultaneous cold-cache requests trigger a single fetch."""
+        async def slow_fetch():
+            await asyncio.sleep(0.01)
+            return sample_problem_data
+        
+        dashboard_service._fetch_all_problem_data = AsyncMock(side_effect=slow_fetch)
+        dashboard_service.collection = static_collection
+        dashboard_service._initialized = True
+        
+        results = await asyncio.gather(*(dashboard_service.get_dashboard_stats() for _ in range(5)))
+        
+        dashboard_service._fetch_all_problem_data.assert_awaited_once()
+        assert all(stats is results[0] for stats in results)
     
     @pytest.mark.asyncio
-    async def test_get_dashboard_stats_force_refresh(self, dashboard_service, sample_problem_data):
+    async def test_get_dashboard_stats_shared_between_processes(
+        self, sample_problem_data, static_collection, tmp_path, monkeypatch
+    ):
+        """A second worker reuses stats the first one published for the same collection state."""
+        from app.services.dashboard_service import settings
+        monkeypatch.setattr(settings, "dashboard_cache_dir", str(tmp_path))
+        
+        workers = [DashboardService(), DashboardService()]
+        for worker in workers:
+            worker._fetch_all_problem_data = AsyncMock(return_value=sample_problem_data)
+            worker.collection = static_collection
+            worker._initialized = True
+        
+        stats1 = await workers[0].get_dashboard_stats()
+        stats2 = await workers[1].get_dashboard_stats()
+        
+        assert stats2 == stats1
+        workers[1]._fetch_all_problem_data.assert_not_awaited()
+        
+        # Once the collection changes the shared entry no longer applies
+        static_collection.count.return_value = 5
+        await workers[1].get_dashboard_stats()
+        workers[1]._fetch_all_problem_data.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_dashboard_stats_force_refresh(self, dashboard_service, sample_problem_data, static_collection):
         """Test forcing refresh of dashboard stats."""
         async def mock_fetch():
             return sample_problem_data
         
         dashboard_service._fetch_all_problem_data = mock_fetch
+        dashboard_service.collection = static_collection
         dashboard_service._initialized = True
         
         # First call
@@ -246,25 +397,66 @@ class TestDashboardService:
         assert stats1.total_problems == stats2.total_problems
     
     @pytest.mark.asyncio
-    async def test_get_category_breakdown(self, dashboard_service, sample_problem_data):
+    async def test_get_category_breakdown(self, dashboard_service, sample_problem_data, static_collection):
         """Test getting category breakdown with percentages."""
-        async def mock_get_stats():
-            return DashboardStats(
-                categories={"Software": 2, "IoT": 1, "Blockchain": 1},
-                top_keywords=[("python", 5), ("react", 3)],
-                top_organizations={"Ministry A": 2, "Ministry B": 2},
-                total_problems=4
-            )
-        
-        dashboard_service.get_dashboard_stats = mock_get_stats
+        metadata_only = {"ids": sample_problem_data["ids"], "metadatas": sample_problem_data["metadatas"]}
+        dashboard_service._fetch_all_problem_data = AsyncMock(return_value=metadata_only)
+        dashboard_service.collection = static_collection
+        dashboard_service._initialized = True
         
         breakdown = await dashboard_service.get_category_breakdown()
         
+        # Documents are not needed for a breakdown, so they are not fetched
+        dashboard_service._fetch_all_problem_data.assert_awaited_once_with(include=("metadatas",))
         assert breakdown["total"] == 4
         assert breakdown["categories"]["Software"]["count"] == 2
         assert breakdown["categories"]["Software"]["percentage"] == 50.0
         assert breakdown["categories"]["IoT"]["percentage"] == 25.0
     
+    @pytest.mark.asyncio
+    async def test_get_category_breakdown_reuses_cached_stats(self, dashboard_service, sample_problem_data, static_collection):
+        """Current dashboard stats and earlier breakdowns are reused without fetching."""
+        dashboard_service._fetch_all_problem_data = AsyncMock(return_value=sample_problem_data)
+        dashboard_service.collection = static_collection
+        dashboard_service._initialized = True
+        
+        await dashboard_service.get_dashboard_stats()
+        first = await dashboard_service.get_category_breakdown()
+        
+        assert await dashboard_service.get_category_breakdown() is first
+        dashboard_service._fetch_all_problem_data.assert_awaited_once_with()
+        assert first["categories"]["Software"]["percentage"] == 50.0
+    
+    @pytest.mark.asyncio
+    async def test_fetch_all_problem_data_metadata_only(self, dashboard_service, static_collection):
+        """Leaving out documents drops them from the request and the result."""
+        static_collection.get.return_value = {"ids": ["sih_001"], "metadatas": [{"category": "IoT"}], "documents": None}
+        dashboard_service.collection = static_collection
+        
+        result = await dashboard_service._fetch_all_problem_data(include=("metadatas",))
+        
+        assert static_collection.get.call_args.kwargs["include"] == ["metadatas"]
+        assert result == {"ids": ["sih_001"], "metadatas": [{"category": "IoT"}]}
+    
+    @pytest.mark.asyncio
+    async def test_technology_trends_reused_until_stats_change(self, dashboard_service):
+        """Trends are computed once per stats object, not once per request."""
+        stats = DashboardStats(
+            categories={"Software": 3, "IoT": 1},
+            top_keywords=[("python", 5)],
+            top_organizations={"Ministry A": 4},
+            total_problems=4
+        )
+        dashboard_service.get_dashboard_stats = AsyncMock(return_value=stats)
+        
+        trends = await dashboard_service.get_technology_trends()
+        assert await dashboard_service.get_technology_trends() is trends
+        
+        dashboard_service.get_dashboard_stats.return_value = stats.model_copy(update={"top_keywords": [("react", 2)]})
+        refreshed = await dashboard_service.get_technology_trends()
+        assert refreshed is not trends
+        assert refreshed["technology_keywords"] == [("react", 2)]
+    
     @pytest.mark.asyncio
     async def test_get_technology_trends(self, dashboard_service):
         """Test getting technology trends."""
@@ -293,33 +485,56 @@ class TestDashboardService:
         assert "python" in tech_keywords
         assert "react" in tech_keywords
     
+    @pytest.mark.asyncio
+    async def test_get_technology_trends_matches_whole_keywords(self, dashboard_service):
+        """Keywords that merely contain a technology name are domain keywords."""
+        dashboard_service.get_dashboard_stats = AsyncMock(return_value=DashboardStats(
+            categories={"Software": 2},
+            top_keywords=[("aim", 6), ("ai", 5), ("mongo", 4), ("javanese", 3)],
+            top_organizations={"Ministry A": 2},
+            total_problems=4
+        ))
+        
+        trends = await dashboard_service.get_technology_trends()
+        
+        assert trends["technology_keywords"] == [("ai", 5), ("mongo", 4)]
+        assert trends["domain_keywords"] == [("aim", 6), ("javanese", 3)]
+    
     @pytest.mark.asyncio
     async def test_clear_cache(self, dashboard_service):
         """Test clearing the cache."""
         # Set some cache data
         dashboard_service._cache = {"stats": "test_data"}
-        dashboard_service._cache_timestamp = datetime.now()
+        dashboard_service._cache_fingerprint = (1, ("sih_001",))
         
         await dashboard_service.clear_cache()
         
         assert len(dashboard_service._cache) == 0
-        assert dashboard_service._cache_timestamp is None
+        assert dashboard_service._cache_fingerprint is None
     
     def test_is_cache_valid(self, dashboard_service):
         """Test cache validity checking."""
-        # No cache timestamp
-        assert not dashboard_service._is_cache_valid()
+        fingerprint = (4, ("sih_001", "sih_002"))
+        
+        # Nothing cached
+        assert not dashboard_service._is_cache_valid(fingerprint)
         
-        # Recent timestamp
-        dashboard_service._cache_timestamp = datetime.now()
-        assert dashboard_service._is_cache_valid()
+        # Cached for the same collection state
+        dashboard_service._cache = {"stats": "test_data"}
+        dashboard_service._cache_fingerprint = fingerprint
+        dashboard_service._cache_generated_at = time.time()
+        assert dashboard_service._is_cache_valid(fingerprint)
         
-        # Old timestamp
-        dashboard_service._cache_timestamp = datetime.now() - timedelta(minutes=20)
-        assert not dashboard_service._is_cache_valid()
+        # Collection changed since
+        assert not dashboard_service._is_cache_valid((5, ("sih_001", "sih_002")))
+        assert not dashboard_service._is_cache_valid((4, ("sih_009", "sih_001")))
+        
+        # Same collection state, but older than the maximum age
+        dashboard_service._cache_generated_at = time.time() - CACHE_MAX_AGE_SECONDS - 1
+        assert not dashboard_service._is_cache_valid(fingerprint)
     
     @pytest.mark.asyncio
-    async def test_health_check_healthy(self, dashboard_service):
+    async def test_health_check_healthy(self, dashboard_service, static_collection):
         """Test health check when service is healthy."""
         async def mock_get_stats():
             return DashboardStats(
@@ -330,7 +545,7 @@ class TestDashboardService:
             )
         
         dashboard_service._initialized = True
-        dashboard_service.collection = Mock()
+        dashboard_service.collection = static_collection
         dashboard_service.get_dashboard_stats = mock_get_stats
         
         health = await dashboard_service.health_check()
@@ -340,6 +555,22 @@ class TestDashboardService:
         assert health["chromadb_connected"] is True
         assert health["total_problems"] == 4
     
+    @pytest.mark.asyncio
+    async def test_health_check_reuses_stats_fingerprint(self, dashboard_service, sample_problem_data, static_collection):
+        """A warm health check reads the collection fingerprint once, through the stats call."""
+        dashboard_service._fetch_all_problem_data = AsyncMock(return_value=sample_problem_data)
+        dashboard_service.collection = static_collection
+        dashboard_service._initialized = True
+        await dashboard_service.get_dashboard_stats()
+        static_collection.count.reset_mock()
+        static_collection.peek.reset_mock()
+        
+        health = await dashboard_service.health_check()
+        
+        assert health["cache_valid"] is True
+        static_collection.count.assert_called_once()
+        static_collection.peek.assert_called_once()
+    
     @pytest.mark.asyncio
     async def test_health_check_unhealthy(self, dashboard_service):
         """Test health check when service is unhealthy."""
@@ -352,12 +583,13 @@ class TestDashboardService:
             assert "error" in health
     
     @pytest.mark.asyncio
-    async def test_get_dashboard_stats_no_data(self, dashboard_service):
+    async def test_get_dashboard_stats_no_data(self, dashboard_service, static_collection):
         """Test getting dashboard stats when no data is available."""
         async def mock_fetch():
-            return []
+            return {"ids": [], "metadatas": [], "documents": []}
         
         dashboard_service._fetch_all_problem_data = mock_fetch
+        dashboard_service.collection = static_collection
         dashboard_service._initialized = True
         
         stats = await dashboard_service.get_dashboard_stats()
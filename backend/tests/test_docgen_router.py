@@ -1,7 +1,7 @@
 import pytest
 import httpx
 from fastapi.testclient import TestClient
-from ..app.main import app
+from app.main import app
 
 client = TestClient(app)
 
@@ -37,3 +37,225 @@ async def test_generate_summary_success():
 # Then I will mark this step as complete.
 # I will use `replace_with_git_merge_diff` to add to the TODO.md file.
 # I need to read it first.
+
+
+def test_generate_summary_uses_shared_client():
+    """The docgen proxy should route through the injected app-wide client."""
+    from app.routers.docgen import get_docgen_client
+
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"summary_md": "This is a test summary."})
+
+    mock_client = httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    )
+    app.dependency_overrides[get_docgen_client] = lambda: mock_client
+    try:
+        payload = {"title": "Test", "description": "Make a tiny API"}
+        response = client.post("/api/docgen/summary", json=payload)
+        response_again = client.post("/api/docgen/summary", json=payload)
+    finally:
+        app.dependency_overrides.pop(get_docgen_client, None)
+
+    assert response.status_code == 200
+    assert response.json() == {"summary_md": "This is a test summary."}
+    assert response_again.status_code == 200
+    assert seen == ["http://docgen-go:8080/v1/docgen/summary"] * 2
+
+
+def test_generate_full_streams_upstream_body():
+    """The /full bundle is forwarded byte-for-byte; upstream errors keep their status."""
+    from app.routers.docgen import get_docgen_client
+
+    upstream_body = b'{"summary_md": "# Summary", "diagrams": []}'
+
+    def handler(request: httpx.Request):
+        if b'"title":"Broken"' in request.content:
+            return httpx.Response(400, json={"error": "bad request"})
+        return httpx.Response(200, content=upstream_body)
+
+    mock_client = httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    )
+    app.dependency_overrides[get_docgen_client] = lambda: mock_client
+    try:
+        response = client.post("/api/docgen/full", json={"title": "Test", "description": "Make a tiny API"})
+        error_response = client.post("/api/docgen/full", json={"title": "Broken", "description": "x"})
+    finally:
+        app.dependency_overrides.pop(get_docgen_client, None)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == upstream_body
+    assert error_response.status_code == 400
+    assert error_response.json()["detail"] == {"error": "bad request"}
+
+
+def test_download_artifact_forwards_body_and_headers():
+    """Artifact downloads pass through upstream bytes and file headers."""
+    from app.routers.docgen import get_docgen_client
+
+    artifact = b"%PDF-1.4 fake artifact bytes"
+
+    async def artifact_stream():
+        # Streamed like a real upstream body (bytes content would be pre-read)
+        yield artifact
+
+    def handler(request: httpx.Request):
+        if request.url.path.endswith("/missing.pdf"):
+            return httpx.Response(404, text="not found")
+        return httpx.Response(
+            200,
+            content=artifact_stream(),
+            headers={
+                "content-type": "application/pdf",
+                "content-length": str(len(artifact)),
+                "content-disposition": 'attachment; filename="doc.pdf"',
+            },
+        )
+
+    mock_client = httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    )
+    app.dependency_overrides[get_docgen_client] = lambda: mock_client
+    try:
+        response = client.get("/api/docgen/download/abc123/doc.pdf")
+        missing = client.get("/api/docgen/download/abc123/missing.pdf")
+    finally:
+        app.dependency_overrides.pop(get_docgen_client, None)
+
+    assert response.status_code == 200
+    assert response.content == artifact
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-disposition"] == 'attachment; filename="doc.pdf"'
+    assert response.headers["content-length"] == str(len(artifact))
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_upstream_call():
+    """Concurrent identical summary requests are coalesced into one upstream call."""
+    import asyncio
+    from app.routers.docgen import _coalesced_proxy_request
+
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.content)
+        return httpx.Response(200, json={"summary_md": "shared"})
+
+    async with httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    ) as mock_client:
+        body = b'{"title":"Test"}'
+        results = await asyncio.gather(
+            _coalesced_proxy_request(mock_client, "POST", "/summary", body),
+            _coalesced_proxy_request(mock_client, "POST", "/summary", body),
+            _coalesced_proxy_request(mock_client, "POST", "/summary", b'{"title":"Other"}'),
+        )
+
+    assert results == [{"summary_md": "shared"}] * 3
+    assert sorted(calls) == sorted([body, b'{"title":"Other"}'])
+
+
+@pytest.mark.asyncio
+async def test_transient_upstream_errors_are_retried(monkeypatch):
+    """A 503 from the docgen service is retried before succeeding."""
+    from app.routers import docgen
+
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(docgen.asyncio, "sleep", no_sleep)
+    statuses = [503, 200]
+
+    def handler(request: httpx.Request):
+        status = statuses.pop(0)
+        return httpx.Response(status, json={"plan_md": "ok"} if status == 200 else {"error": "busy"})
+
+    async with httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    ) as mock_client:
+        result = await docgen._proxy_request(mock_client, "POST", "/plan", b"{}")
+
+    assert result == {"plan_md": "ok"}
+    assert statuses == []
+
+
+@pytest.mark.asyncio
+async def test_body_read_errors_are_retried(monkeypatch):
+    """A failure while reading the upstream body is retried, then reported as 503."""
+    from fastapi import HTTPException
+    from app.routers import docgen
+
+    async def no_sleep(_):
+        return None
+
+    async def broken_body():
+        raise httpx.ReadError("connection reset")
+        yield b""
+
+    monkeypatch.setattr(docgen.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(docgen.random, "uniform", lambda a, b: 0.0)
+    bodies = [broken_body, None]
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        body = bodies.pop(0) if bodies else broken_body
+        if body is None:
+            return httpx.Response(200, json={"plan_md": "ok"})
+        return httpx.Response(200, content=body())
+
+    async with httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    ) as mock_client:
+        result = await docgen._proxy_request(mock_client, "POST", "/plan", b"{}")
+        assert result == {"plan_md": "ok"}
+
+        with pytest.raises(HTTPException) as exc_info:
+            await docgen._proxy_request(mock_client, "POST", "/plan", b"{}")
+
+    assert exc_info.value.status_code == 503
+    assert len(calls) == 2 + 3
+
+
+@pytest.mark.asyncio
+async def test_error_body_read_failures_are_retried(monkeypatch):
+    """A failure while reading an upstream error body is retried, then reported as 503."""
+    from fastapi import HTTPException
+    from app.routers import docgen
+
+    async def no_sleep(_):
+        return None
+
+    async def broken_body():
+        raise httpx.ReadError("connection reset")
+        yield b""
+
+    monkeypatch.setattr(docgen.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(docgen.random, "uniform", lambda a, b: 0.0)
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        return httpx.Response(500, content=broken_body())
+
+    async with httpx.AsyncClient(
+        base_url="http://docgen-go:8080/v1/docgen",
+        transport=httpx.MockTransport(handler),
+    ) as mock_client:
+        with pytest.raises(HTTPException) as exc_info:
+            await docgen._proxy_request(mock_client, "POST", "/plan", b"{}")
+
+    assert exc_info.value.status_code == 503
+    assert len(calls) == 3
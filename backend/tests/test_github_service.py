@@ -1,12 +1,13 @@
 """
 Unit tests for the GitHub integration service functionality.
 """
+import asyncio
 import json
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
-from datetime import datetime, timedelta
 
 import httpx
+import orjson
 from fastapi import HTTPException
 
 from app.services.github_service import GitHubService
@@ -68,14 +69,8 @@ class TestGitHubService:
     
     @pytest.fixture
     def mock_readme_response(self):
-        """Mock GitHub README API response."""
-        import base64
-        readme_content = "# ML Project\nThis project implements image classification using TensorFlow and Python."
-        encoded_content = base64.b64encode(readme_content.encode()).decode()
-        return {
-            "content": encoded_content,
-            "encoding": "base64"
-        }
+        """Mock raw GitHub README API response body."""
+        return b"# ML Project\nThis project implements image classification using TensorFlow and Python."
     
     @pytest.mark.asyncio
     async def test_get_github_profile_success(self, github_service, mock_github_user_response, mock_github_repos_response, mock_readme_response):
@@ -93,12 +88,13 @@ class TestGitHubService:
             # Mock repos response
             repos_response = Mock()
             repos_response.status_code = 200
-            repos_response.json.return_value = mock_github_repos_response
+            repos_response.content = orjson.dumps(mock_github_repos_response)
             
             # Mock README response
             readme_response = Mock()
             readme_response.status_code = 200
-            readme_response.json.return_value = mock_readme_response
+            readme_response.content = mock_readme_response
+            readme_response.headers = {}
             
             # Setup client.get to return different responses based on URL
             def mock_get(url, **kwargs):
@@ -234,6 +230,28 @@ class TestGitHubService:
         assert "ml-classifier" in dna
         assert "Image classification" in dna
     
+    def test_generate_github_dna_is_deterministic(self, github_service):
+        """Topics keep first-seen order and only the first README sentences are used."""
+        profile = GitHubProfile(
+            username="testuser",
+            tech_stack=["Python"],
+            repositories=[
+                Repository(
+                    name="a",
+                    topics=["iot", "python"],
+                    readme_content="A sensor network for monitoring soil moisture. Uses ESP32. Third sentence is dropped here."
+                ),
+                Repository(name="b", topics=["python", "agriculture"])
+            ]
+        )
+        
+        dna = github_service.generate_github_dna(profile)
+        
+        assert "Interests: iot, python, agriculture" in dna
+        assert "A sensor network for monitoring soil moisture" in dna
+        assert "Uses ESP32" not in dna  # Too short to count as a sentence
+        assert "Third sentence" not in dna
+    
     @pytest.mark.asyncio
     async def test_get_recommendations_success(self, github_service):
         """Test successful recommendation generation."""
@@ -281,16 +299,85 @@ class TestGitHubService:
             assert results[0].problem.title == "AI-Based Traffic Management"
             assert results[0].similarity_score == 0.85
     
-    def test_cache_functionality(self, github_service):
-        """Test caching mechanism."""
-        # Test cache storage
-        test_data = {"test": "data"}
-        github_service._cache_data("test_key", test_data)
+    @pytest.mark.asyncio
+    async def test_profile_cache_coalesces_and_reuses_fetches(self, github_service):
+        """Concurrent and repeated lookups for one user share a single fetch."""
+        import asyncio
+        
+        profile = GitHubProfile(username="testuser", repositories=[], tech_stack=[])
         
-        assert "test_key" in github_service.cache
-        assert github_service.cache["test_key"]["data"] == test_data
-        assert isinstance(github_service.cache["test_key"]["timestamp"], datetime)
+        async def slow_fetch(username):
+            await asyncio.sleep(0.01)
+            return profile
+        
+        with patch.object(github_service, '_fetch_github_profile', side_effect=slow_fetch) as mock_fetch:
+            results = await asyncio.gather(
+                github_service.get_github_profile("testuser"),
+                github_service.get_github_profile("TestUser"),
+            )
+            again = await github_service.get_github_profile("TESTUSER")
+        
+        assert results == [profile, profile]
+        assert again is profile
+        mock_fetch.assert_called_once_with("testuser")
+    
+    @pytest.mark.asyncio
+    async def test_profile_cache_does_not_keep_errors(self, github_service):
+        """A failed fetch is retried on the next lookup."""
+        profile = GitHubProfile(username="testuser", repositories=[], tech_stack=[])
+        fetch = AsyncMock(side_effect=[HTTPException(status_code=502, detail="boom"), profile])
+        
+        with patch.object(github_service, '_fetch_github_profile', fetch):
+            with pytest.raises(HTTPException):
+                await github_service.get_github_profile("testuser")
+            assert await github_service.get_github_profile("testuser") is profile
+        
+        assert fetch.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_fetch_readme_requests_raw_prefix_and_revalidates(self, github_service):
+        """READMEs are fetched raw and truncated, and revalidated by ETag."""
+        requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(206, content=("é" * 600).encode(), headers={"ETag": '"v1"'})
+        
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await github_service._fetch_readme(client, {}, "testuser/ml-project")
+            second = await github_service._fetch_readme(client, {}, "testuser/ml-project")
+        
+        assert first == second == "é" * 500
+        assert requests[0].headers["Accept"] == "application/vnd.github.v3.raw"
+        assert requests[0].headers["Range"] == "bytes=0-2047"
+        assert "If-None-Match" not in requests[0].headers
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+    
+    @pytest.mark.asyncio
+    async def test_profile_readmes_fetched_concurrently(self, github_service, mock_github_repos_response):
+        """README requests overlap, and repositories keep their listing order."""
+        in_flight = 0
+        peak = 0
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            if request.url.path.endswith("/readme"):
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return httpx.Response(200, content=request.url.path.encode())
+            if request.url.path.endswith("/repos"):
+                return httpx.Response(200, json=mock_github_repos_response)
+            return httpx.Response(200, json={"login": "testuser"})
+        
+        transport = httpx.MockTransport(handler)
+        real_client = httpx.AsyncClient
+        with patch("httpx.AsyncClient", side_effect=lambda **kwargs: real_client(transport=transport)):
+            profile = await github_service.get_github_profile("testuser")
         
-        # Test cache retrieval
-        assert github_service._is_cached("test_key") is True
-        assert github_service._is_cached("nonexistent_key") is False
\ No newline at end of file
+        assert peak == 2
+        assert [repo.name for repo in profile.repositories] == ["ml-project", "web-app"]
+        assert profile.repositories[1].readme_content == "/repos/testuser/web-app/readme"
@@ -8,9 +8,18 @@ from datetime import datetime
 
 from app.main import app
 from app.models import ProblemStatement, SearchResult
+from app.routers.search import clear_search_cache
 from app.services.search_service import SearchServiceError
 
 
+@pytest.fixture(autouse=True)
+def reset_search_cache():
+    """Start every test with an empty search result cache."""
+    clear_search_cache()
+    yield
+    clear_search_cache()
+
+
 class TestSearchRouter:
     """Test cases for search router endpoints."""
     
@@ -336,6 +345,50 @@ class TestSearchRouter:
                 assert isinstance(score, (int, float))
                 assert 0.0 <= score <= 1.0
 
+    
+    def test_semantic_search_cached_per_query_and_limit(self, client, sample_search_results):
+        """Repeated searches are served from the cache; a different limit is not."""
+        with patch('app.routers.search.search_service.search', new_callable=AsyncMock) as mock_search:
+            mock_search.return_value = sample_search_results
+            
+            first = client.post("/api/search/", json={"query": "AI healthcare", "limit": 5})
+            second = client.post("/api/search/", json={"query": "  ai HEALTHCARE ", "limit": 5})
+            other_limit = client.post("/api/search/", json={"query": "AI healthcare", "limit": 6})
+            
+            assert first.status_code == second.status_code == other_limit.status_code == 200
+            assert first.content == second.content
+            assert mock_search.call_count == 2
+    
+    def test_semantic_search_errors_not_cached(self, client, sample_search_results):
+        """A failed search is retried on the next request."""
+        with patch('app.routers.search.search_service.search', new_callable=AsyncMock) as mock_search:
+            mock_search.side_effect = [SearchServiceError("down"), sample_search_results]
+            
+            assert client.post("/api/search/", json={"query": "AI healthcare"}).status_code == 500
+            assert client.post("/api/search/", json={"query": "AI healthcare"}).status_code == 200
+    
+    def test_batch_semantic_search(self, client, sample_search_results):
+        """Batch search returns one result list per query in request order."""
+        with patch('app.routers.search.search_service.search_many', new_callable=AsyncMock) as mock_many:
+            mock_many.return_value = [sample_search_results[:1], []]
+            
+            response = client.post("/api/search/batch", json=[
+                {"query": " AI healthcare ", "limit": 3},
+                {"query": "IoT"}
+            ])
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data) == 2
+            assert data[0][0]["problem"]["id"] == "test_001"
+            assert data[1] == []
+            mock_many.assert_called_once_with(["AI healthcare", "IoT"], [3, 20])
+    
+    def test_batch_semantic_search_rejects_bad_batches(self, client):
+        """Empty batches, oversized batches and blank queries are rejected."""
+        assert client.post("/api/search/batch", json=[]).status_code == 400
+        assert client.post("/api/search/batch", json=[{"query": "q"}] * 33).status_code == 400
+        assert client.post("/api/search/batch", json=[{"query": "q"}, {"query": "  "}]).status_code == 400
 
 @pytest.mark.asyncio
 class TestSearchRouterIntegration:
@@ -66,8 +66,8 @@ class TestSearchService:
     @pytest.mark.asyncio
     async def test_initialize_success(self, search_service):
         """Test successful initialization of search service."""
-        with patch('app.services.search_service.SentenceTransformer') as mock_st, \
-             patch('app.services.search_service.chromadb.HttpClient') as mock_client:
+        with patch('sentence_transformers.SentenceTransformer') as mock_st, \
+             patch('chromadb.HttpClient') as mock_client:
             
             # Mock sentence transformer
             mock_model = Mock()
@@ -98,8 +98,8 @@ class TestSearchService:
     @pytest.mark.asyncio
     async def test_initialize_chromadb_connection_failure(self, search_service):
         """Test initialization failure when ChromaDB connection fails."""
-        with patch('app.services.search_service.SentenceTransformer') as mock_st, \
-             patch('app.services.search_service.chromadb.HttpClient') as mock_client:
+        with patch('sentence_transformers.SentenceTransformer') as mock_st, \
+             patch('chromadb.HttpClient') as mock_client:
             
             # Mock sentence transformer
             mock_st.return_value = Mock()
@@ -181,6 +181,43 @@ class TestSearchService:
             mock_init.assert_called_once()
             assert isinstance(results, list)
     
+    @pytest.mark.asyncio
+    async def test_search_many_single_encode_and_query(self, search_service, mock_chroma_collection, mock_sentence_model, sample_chroma_results):
+        """Batched search embeds and queries once, then splits results per query."""
+        search_service._initialized = True
+        search_service.sentence_model = mock_sentence_model
+        search_service.collection = mock_chroma_collection
+        mock_sentence_model.encode.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        mock_chroma_collection.query.return_value = {
+            key: value * 2 for key, value in sample_chroma_results.items()
+        }
+        
+        results = await search_service.search_many(["machine learning", "iot"], [1, 5])
+        
+        assert [len(r) for r in results] == [1, 2]
+        assert results[0][0].problem.id == "sih_001"
+        mock_sentence_model.encode.assert_called_once_with(["machine learning", "iot"], batch_size=32)
+        mock_chroma_collection.query.assert_called_once_with(
+            query_embeddings=[[0.1, 0.2], [0.3, 0.4]],
+            n_results=5,
+            include=["metadatas", "documents", "distances"]
+        )
+    
+    @pytest.mark.asyncio
+    async def test_search_reuses_embedding_for_repeated_query(self, search_service, mock_chroma_collection, mock_sentence_model, sample_chroma_results):
+        """Repeating a query reuses its embedding instead of encoding again."""
+        search_service._initialized = True
+        search_service.sentence_model = mock_sentence_model
+        search_service.collection = mock_chroma_collection
+        mock_chroma_collection.query.return_value = sample_chroma_results
+        
+        await search_service.search("machine learning", limit=10)
+        await search_service.search("machine learning", limit=5)
+        
+        mock_sentence_model.encode.assert_called_once_with(["machine learning"])
+        assert mock_chroma_collection.query.call_count == 2
+        assert mock_chroma_collection.query.call_args.kwargs["query_embeddings"] == [[0.1, 0.2, 0.3, 0.4, 0.5]]
+    
     @pytest.mark.asyncio
     async def test_search_empty_results(self, search_service, mock_chroma_collection, mock_sentence_model):
         """Test search with no results."""
@@ -367,13 +404,29 @@ class TestSearchService:
         assert result.problem.difficulty_level == "Medium"
         assert result.similarity_score == 0.7  # 1.0 - 0.3 distance
     
+    def test_convert_metadata_to_problem_comma_separated_tech_stack(self, search_service):
+        """Test conversion of the comma-separated technology stack written by ingestion."""
+        metadata = {
+            "title": "Test Problem",
+            "organization": "Test Org",
+            "category": "Software",
+            "technology_stack": "Python, C++, React Native",
+            "difficulty_level": "Medium",
+            "created_at": "2024-01-01T00:00:00"
+        }
+        document = "Test Problem\nTest description\nTech Stack: Python C++ React Native"
+        
+        result = search_service._convert_metadata_to_problem("test_001", metadata, document, 0.2)
+        
+        assert result.problem.technology_stack == ["Python", "C++", "React Native"]
+    
     def test_convert_metadata_to_problem_invalid_tech_stack(self, search_service):
         """Test conversion with invalid technology stack JSON."""
         metadata = {
             "title": "Test Problem",
             "organization": "Test Org",
             "category": "Software",
-            "technology_stack": 'invalid json',  # Invalid JSON
+            "technology_stack": '["Python", ',  # Truncated JSON array
             "difficulty_level": "Medium",
             "created_at": "2024-01-01T00:00:00"
         }
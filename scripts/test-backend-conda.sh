@@ -30,7 +30,9 @@ $PY -m pip install -r "$REQ_FILE" pytest
 echo "Running pytest..."
 cd "$ROOT_DIR/backend"
 set +e
-$PY -m pytest -q
+# One worker per CPU; test modules stay whole on a worker so module-level
+# fixtures and patches are not split across processes
+$PY -m pytest -q -n auto --dist=loadfile
 STATUS=$?
 set -e
 